@@ -1,12 +1,20 @@
 import jwt  
 from jwt import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database.database import SessionLocal
+from sqlalchemy import select
+from app.database.database import SessionLocal, AsyncSessionLocal
 from app.database.schemas import User, UserRole
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+from app.core.logger import logger
 
 SECRET_KEY = "supersecret"
 ALGORITHM = "HS256"
@@ -28,6 +36,60 @@ def verify_password(plain, hashed):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# sha256_crypt намеренно медленный: в async-маршрутах считаем его в отдельных процессах,
+# чтобы не держать GIL и потоки threadpool. Семафор ограничивает очередь ожидающих.
+_hash_pool = None
+_hash_slots = None
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # Не fork: к этому моменту работают потоки log_sink, снимка, планировщика и метрик,
+        # и дочерний процесс мог бы унаследовать захваченную ими блокировку
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.auth.auth"])
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, mp_context=context)
+    return _hash_pool
+
+def _reset_hash_pool(broken: ProcessPoolExecutor):
+    """Сбрасывает пул, у которого умер процесс, — следующий вызов создаст новый"""
+    global _hash_pool
+    if _hash_pool is broken:
+        _hash_pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+async def _run_hashing(func, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_QUEUE)
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=settings.PASSWORD_HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Too many concurrent login attempts, retry later")
+    try:
+        loop = asyncio.get_running_loop()
+        pool = _get_hash_pool()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            logger.error("Password hash pool is broken, recreating it")
+            _reset_hash_pool(pool)
+            return await loop.run_in_executor(_get_hash_pool(), func, *args)
+    finally:
+        _hash_slots.release()
+
+async def averify_password(plain, hashed):
+    return await _run_hashing(verify_password, plain, hashed)
+
+async def aget_password_hash(password):
+    return await _run_hashing(get_password_hash, password)
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
 def create_access_token(data: dict, expires_delta=None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -42,7 +104,21 @@ def decode_token(token: str):
     except InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+@dataclass(frozen=True)
+class Principal:
+    """Данные пользователя для проверки доступа; не привязаны к сессии БД, поэтому их можно кэшировать"""
+    id: int
+    email: str
+    role: UserRole
+
+# Кэш по email (sub токена). Токен всё равно проверяется на каждом запросе, из кэша берётся только пользователь.
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+def invalidate_principal(email: str):
+    """Сбрасывает закэшированного пользователя — вызывать при создании пользователя и смене роли"""
+    principal_cache.pop(email)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials"
     )
@@ -50,13 +126,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+
+    principal = principal_cache.get(email)
+    if principal is MISSING:
+        # Сессия открывается только при промахе кэша
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).filter(User.email == email))).scalars().first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal(id=user.id, email=user.email, role=user.role)
+        principal_cache.set(email, principal)
+    return principal
 
 def require_role(required_role: UserRole):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role != required_role:
             raise HTTPException(status_code=403, detail=f"{required_role} role required")
         return current_user
@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from app.auth.controllers.auth_controller import AuthController
-from app.auth.auth import get_db, get_current_user, require_role
+from app.auth.auth import get_current_user, require_role
+from app.database.database import get_async_db
 from app.auth.models.auth_models import UserRole
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    return AuthController.login(form_data, db)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await AuthController.login(form_data, db)
 
 @router.post("/register")
-def register_user(email: str, password: str, role: UserRole, db: Session = Depends(get_db)):
-    return AuthController.register(email, password, role, db)
+async def register_user(email: str, password: str, role: UserRole, db: AsyncSession = Depends(get_async_db)):
+    return await AuthController.register(email, password, role, db)
 
 @router.get("/me")
-def get_me(current_user=Depends(get_current_user)):
+async def get_me(current_user=Depends(get_current_user)):
     return {"email": current_user.email, "role": current_user.role}
@@ -0,0 +1,164 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.http_cache import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него остаётся gzip
+    brotli = None
+
+# Сжимаем только текстовые форматы: xlsx, картинки и шрифты уже сжаты
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class _Encoder:
+    """Единый интерфейс над zlib (gzip) и brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 — формат gzip (заголовок + CRC)
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Выталкивает накопленное, не закрывая поток — для StreamingResponse"""
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """ASGI-сжатие ответов: brotli (если установлен) или gzip по Accept-Encoding.
+
+    Маленькие ответы (< minimum_size) отдаются как есть. Потоковые ответы
+    сжимаются по частям, каждая часть сразу уходит клиенту.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 content_types=COMPRESSIBLE_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_types)
+
+    def _choose_encoding(self, headers: Headers):
+        if "range" in headers:
+            # Частичные ответы (206) не сжимаем — диапазоны относятся к исходным байтам
+            return None
+        accepted = accepted_encodings(headers.get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        encoding = self._choose_encoding(request_headers)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                status = message["status"]
+                passthrough = (
+                    status < 200 or status in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(self.content_types)
+                )
+                if status == 304 and "etag" in headers:
+                    # Клиент ревалидирует сжатое представление — 304 подтверждает именно его ETag
+                    compressed_etag = encoded_etag(headers["etag"], encoding)
+                    if compressed_etag in request_headers.get("if-none-match", ""):
+                        MutableHeaders(raw=message["headers"])["ETag"] = compressed_etag
+                if passthrough:
+                    await send(message)
+                else:
+                    # Заголовки отправим вместе с первым куском тела, когда станет ясен размер
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    # Сжатое тело побайтно отличается от несжатого — сильный ETag не может быть общим
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            if more_body:
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
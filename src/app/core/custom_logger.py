@@ -1,12 +1,14 @@
 from fastapi import FastAPI, Request
 from starlette.responses import Response
 from app.core.logger import log_to_db, logger
+from app.core.log_policy import log_policy
+from app.core.metrics import request_metrics
+from app.core.profiling import RequestProfile
+from app.core import db_stats
 import time
-import json
-from user_agents import parse
 
 class LoggedFastAPI(FastAPI):
-    """Наследник FastAPI, логирующий все запросы в БД с дополнительными метаданными."""
+    """Наследник FastAPI, логирующий запросы в БД с дополнительными метаданными (отбор — log_policy)."""
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
@@ -19,43 +21,69 @@ class LoggedFastAPI(FastAPI):
         user_agent = request.headers.get("user-agent", "")
         referer = request.headers.get("referer")
         
-        user_agent_parsed = parse(user_agent)
-        browser = f"{user_agent_parsed.browser.family} {user_agent_parsed.browser.version_string}"
-        os = f"{user_agent_parsed.os.family} {user_agent_parsed.os.version_string}"
-        device = user_agent_parsed.device.family
+        # Счётчик SQL-запросов этого запроса — его наполняют хуки движков БД
+        query_stats = db_stats.begin_request()
+        profile, profile_error = RequestProfile.begin(self, scope, request)
+
+        status_code = None
 
         async def send_wrapper(message):
+            nonlocal status_code
             if message["type"] == "http.response.start":
-                process_time = time.time() - start_time
                 status_code = message["status"]
-                
-                log_message = f"{request.method} {request.url.path} [{process_time:.2f}s] [{status_code}]"
-                logger.info(log_message)
-                
-                metadata = {
-                    "ip_address": client_ip,
-                    "user_agent": user_agent,
-                    "browser": browser,
-                    "operating_system": os,
-                    "device": device,
-                    "processing_time": round(process_time, 3),
-                    "status_code": status_code,
-                    "referer": referer,
-                    "query_params": str(request.query_params) if request.query_params else None,
-                    "headers": {
-                        k: v for k, v in request.headers.items() 
-                        if k.lower() not in ['authorization', 'cookie']  
-                    }
-                }
-                
-                log_to_db(
-                    level="INFO",
-                    message=log_message,
-                    path=request.url.path,
-                    method=request.method,
-                    ip_address=client_ip,
-                    metadata=metadata
-                )
+                if profile is not None:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+                elif profile_error is not None:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-error", profile_error.encode())]
             await send(message)
 
-        await super().__call__(scope, receive, send_wrapper)
\ No newline at end of file
+        try:
+            await super().__call__(scope, receive, send_wrapper)
+        finally:
+            if profile is not None:
+                profile.stop()
+            # Итоги — после отправки тела: запросы к БД внутри StreamingResponse тоже учитываются
+            if status_code is not None:
+                self._record(request, scope, status_code, time.time() - start_time, query_stats,
+                             client_ip, user_agent, referer)
+
+    @staticmethod
+    def _record(request, scope, status_code, process_time, query_stats, client_ip, user_agent, referer):
+        # Шаблон маршрута (например, /api/iiko/licenses) — роутер кладёт его в scope при матчинге
+        route = scope.get("route")
+        request_metrics.observe(
+            request.method, getattr(route, "path", "<unmatched>"), status_code, process_time,
+            query_stats.queries, query_stats.db_time,
+        )
+
+        log_message = (
+            f"{request.method} {request.url.path} [{process_time:.2f}s] [{status_code}] "
+            f"[db {query_stats.queries}q {query_stats.db_time:.3f}s]"
+        )
+        logger.info(log_message)
+
+        path = request.url.path
+        if log_policy.should_log(path, status_code, process_time):
+            metadata = {
+                "ip_address": client_ip,
+                # browser / operating_system / device добавляет фоновый log_sink
+                "user_agent": user_agent,
+                "processing_time": round(process_time, 3),
+                "status_code": status_code,
+                "db_queries": query_stats.queries,
+                "db_time": round(query_stats.db_time, 4),
+                "referer": referer,
+                "query_params": str(request.query_params) if request.query_params else None,
+                "headers": log_policy.filter_headers(request.headers),
+            }
+            if log_policy.sampled(status_code, process_time):
+                metadata["sample_rate"] = log_policy.sample_rate
+
+            log_to_db(
+                level="INFO",
+                message=log_message,
+                path=path,
+                method=request.method,
+                ip_address=client_ip,
+                metadata=log_policy.trim(metadata),
+            )
@@ -0,0 +1,54 @@
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+
+class QueryStats:
+    """Число SQL-запросов и суммарное время в БД в рамках одного HTTP-запроса"""
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Объект кладётся в контекст в начале запроса; threadpool и greenlet asyncpg наследуют контекст,
+# поэтому хуки движков видят тот же объект. Фоновые потоки (log_sink, планировщик) его не видят.
+_current: ContextVar = ContextVar("query_stats", default=None)
+
+
+def begin_request() -> QueryStats:
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def current():
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _handle_error(context):
+    # after_cursor_execute при ошибке не вызывается — снимаем отметку времени здесь
+    connection = context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument(sync_engine):
+    """Вешает хуки на движок; для AsyncEngine передавать async_engine.sync_engine"""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,226 @@
+"""Раздача собранного фронтенда (client_dist).
+
+Структура каталога читается один раз и хранится в памяти, index.html — целиком.
+Повторное чтение происходит, только если у index.html сменился mtime (новая сборка);
+mtime проверяется не чаще раза в FRONTEND_CHECK_INTERVAL секунд.
+
+Сжатые варианты (.br/.gz) можно подготовить при сборке образа:
+
+    python -m app.core.frontend client_dist
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from starlette.responses import FileResponse, Response
+from app.core.compression import COMPRESSIBLE_TYPES, accepted_encodings, brotli
+from app.core.config import settings
+from app.core.http_cache import encoded_etag, http_date, is_not_modified, make_etag
+
+logger = logging.getLogger("app_logger")
+
+INDEX = "index.html"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Порядок предпочтения и расширения готовых вариантов рядом с исходным файлом
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(data: bytes, encoding: str, fast: bool = False) -> bytes:
+    """Максимальное сжатие; fast — уровни COMPRESSION_* для сжатия в момент запроса"""
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY if fast else 11)
+    # mtime=0 — одинаковый результат при каждой сборке
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL if fast else 9, mtime=0)
+
+
+class _File:
+    """Файл сборки: метаданные, готовые варианты на диске и сжатые в памяти"""
+
+    def __init__(self, path: str, stat: os.stat_result, immutable: bool):
+        self.path = path
+        self.stat = stat
+        self.immutable = immutable
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.compressible = self.media_type.startswith(COMPRESSIBLE_TYPES)
+        self.etag_base = make_etag(os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+        self.last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        self.body = None
+        self.precompressed = {}
+        self.compressed = {}
+
+    def etag(self, encoding: str = None) -> str:
+        # У каждого варианта кодирования свой сильный ETag
+        return encoded_etag(self.etag_base, encoding) if encoding else self.etag_base
+
+
+class _Build:
+    def __init__(self, index: _File, files: dict):
+        self.index = index
+        self.files = files
+
+
+class FrontendAssets:
+    """index.html в памяти, хешированные файлы из assets/ — с immutable-кэшем,
+    сжатые варианты выбираются по Accept-Encoding. Неизвестные пути без расширения
+    получают index.html (маршруты SPA) без обращения к файловой системе.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.immutable_prefix = settings.FRONTEND_IMMUTABLE_PREFIX
+        self.check_interval = settings.FRONTEND_CHECK_INTERVAL
+        self.compress_max_size = settings.FRONTEND_COMPRESS_MAX_SIZE
+        self._lock = threading.Lock()
+        self._compress_lock = threading.Lock()
+        self._build = None
+        self._checked_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self._current() is not None
+
+    def load(self):
+        """Читает сборку; вызывается при старте воркера"""
+        with self._lock:
+            self._build = self._scan()
+            self._checked_at = time.monotonic()
+
+    def _scan(self):
+        index_path = os.path.join(self.directory, INDEX)
+        if not os.path.isfile(index_path):
+            return None
+        start = time.perf_counter()
+        files = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                files[rel] = path
+
+        build_files = {}
+        for rel, path in files.items():
+            if any(rel.endswith(ext) and rel[:-len(ext)] in files for _, ext in ENCODINGS):
+                continue
+            item = _File(path, os.stat(path), rel.startswith(self.immutable_prefix))
+            for encoding, ext in ENCODINGS:
+                if rel + ext in files and (encoding != "br" or brotli is not None):
+                    item.precompressed[encoding] = (files[rel + ext], os.stat(files[rel + ext]))
+            build_files[rel] = item
+
+        index = build_files.pop(INDEX)
+        with open(index.path, "rb") as f:
+            index.body = f.read()
+        for encoding, _ in ENCODINGS:
+            if encoding != "br" or brotli is not None:
+                index.compressed[encoding] = _compress(index.body, encoding)
+        logger.info(f"Frontend loaded: {len(build_files) + 1} files [{time.perf_counter() - start:.3f}s]")
+        return _Build(index, build_files)
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._build
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._build
+            self._checked_at = now
+            build = self._build
+            try:
+                mtime = os.stat(os.path.join(self.directory, INDEX)).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if (build.index.stat.st_mtime_ns if build is not None else None) != mtime:
+                self._build = self._scan()
+        return self._build
+
+    def response(self, path: str, headers):
+        """Ответ для пути фронтенда; None — сборки нет"""
+        build = self._current()
+        if build is None:
+            return None
+        rel = path.lstrip("/")
+        item = build.files.get(rel)
+        if item is None:
+            # Отсутствующий файл (есть расширение) — 404, а не index.html под видом скрипта
+            if "." in rel.rsplit("/", 1)[-1] and rel != INDEX:
+                return Response(status_code=404)
+            item = build.index
+        return self._serve(item, headers)
+
+    def _choose_encoding(self, item: _File, headers):
+        if not item.compressible or "range" in headers:
+            return None
+        accepted = accepted_encodings(headers.get("accept-encoding", ""))
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and (encoding in item.precompressed or encoding in item.compressed):
+                return encoding
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and (encoding != "br" or brotli is not None):
+                if item.stat.st_size <= self.compress_max_size:
+                    return self._compress_lazily(item, encoding)
+        return None
+
+    def _compress_lazily(self, item: _File, encoding: str):
+        # Готового варианта нет — сжимаем один раз и держим в памяти
+        with self._compress_lock:
+            if encoding not in item.compressed:
+                with open(item.path, "rb") as f:
+                    item.compressed[encoding] = _compress(f.read(), encoding, fast=True)
+        return encoding
+
+    def _serve(self, item: _File, headers) -> Response:
+        encoding = self._choose_encoding(item, headers)
+        etag = item.etag(encoding)
+        response_headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(item.last_modified),
+            "Cache-Control": IMMUTABLE if item.immutable else REVALIDATE,
+        }
+        if item.compressible:
+            response_headers["Vary"] = "Accept-Encoding"
+        if is_not_modified(headers, etag, item.last_modified):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+            if encoding in item.compressed:
+                return Response(item.compressed[encoding], media_type=item.media_type, headers=response_headers)
+            path, stat = item.precompressed[encoding]
+            return FileResponse(path, media_type=item.media_type, headers=response_headers, stat_result=stat)
+        if item.body is not None:
+            return Response(item.body, media_type=item.media_type, headers=response_headers)
+        return FileResponse(item.path, media_type=item.media_type, headers=response_headers, stat_result=item.stat)
+
+
+def precompress(directory: str) -> int:
+    """Пишет .gz (и .br при наличии brotli) рядом с текстовыми файлами сборки"""
+    written = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, name)
+            media_type = mimetypes.guess_type(path)[0] or ""
+            if not media_type.startswith(COMPRESSIBLE_TYPES) or os.path.getsize(path) < settings.COMPRESSION_MIN_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            for encoding, ext in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                body = _compress(data, encoding)
+                if len(body) < len(data):
+                    with open(path + ext, "wb") as f:
+                        f.write(body)
+                    written += 1
+    return written
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "client_dist"
+    print(f"Precompressed {precompress(target)} files in {target}")
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+# Суффиксы ETag сжатых представлений: у gzip/br-тела свой ETag, отличный от несжатого
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag сжатого представления: "x" -> "x-gzip", W/"x" -> W/"x-gzip" """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _etag_base(tag: str) -> str:
+    tag = tag.strip().removeprefix("W/")
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из JSON-сериализуемых частей (версия данных, параметры запроса)"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # DateTime без таймзоны в БД хранится в UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def is_not_modified(headers, etag: str, last_modified: datetime = None) -> bool:
+    """Проверка If-None-Match (приоритетно) и If-Modified-Since для ответа 304"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # Для GET сравнение слабое: W/"x" совпадает с "x", а варианты одного ресурса
+        # в разных Content-Encoding ("x", "x-gzip", "x-br") — между собой
+        tags = {_etag_base(tag) for tag in if_none_match.split(",")}
+        return "*" in tags or _etag_base(etag) in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
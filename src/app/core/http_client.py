@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger("app_logger")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class UpstreamClient:
+    """HTTP-клиент внешнего API: общий пул keep-alive соединений, таймауты, ретраи и замер латентности."""
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict,
+        connect_timeout: float,
+        read_timeout: float,
+        max_connections: int,
+        max_keepalive: int,
+        retries: int,
+        backoff: float,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+        self._latency = {}
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(headers=self.headers, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(headers=self.headers, timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _attempts(self, method: str, idempotent) -> int:
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return self.retries + 1 if idempotent else 1
+
+    def _retry_delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка с полным джиттером
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _should_retry(self, attempt: int, attempts: int, response=None, error=None) -> bool:
+        if attempt + 1 >= attempts:
+            return False
+        if error is not None:
+            return isinstance(error, httpx.TransportError)
+        return response.status_code in RETRY_STATUSES
+
+    def _record(self, name: str, elapsed: float, ok: bool):
+        with self._lock:
+            stat = self._latency.setdefault(name, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stat["count"] += 1
+            stat["errors"] += 0 if ok else 1
+            stat["total"] += elapsed
+            stat["max"] = max(stat["max"], elapsed)
+        logger.debug(f"upstream {name} [{elapsed:.3f}s] ok={ok}")
+
+    def stats(self) -> dict:
+        """Латентность по именам вызовов: count, errors, avg, max (секунды)"""
+        with self._lock:
+            return {
+                name: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "avg": round(s["total"] / s["count"], 4) if s["count"] else 0.0,
+                    "max": round(s["max"], 4),
+                }
+                for name, s in self._latency.items()
+            }
+
+    def request(self, method: str, path: str = "", *, name: str = None, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """Синхронный вызов. Ошибочный HTTP-статус -> httpx.HTTPStatusError."""
+        name = name or f"{method} {path or '/'}"
+        attempts = self._attempts(method, idempotent)
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                response = self.client.request(method, self._url(path), **kwargs)
+            except httpx.HTTPError as e:
+                self._record(name, time.perf_counter() - start, False)
+                if not self._should_retry(attempt, attempts, error=e):
+                    raise
+            else:
+                self._record(name, time.perf_counter() - start, response.is_success)
+                if not self._should_retry(attempt, attempts, response=response):
+                    return response.raise_for_status()
+            time.sleep(self._retry_delay(attempt))
+
+    @contextmanager
+    def stream(self, method: str, path: str = "", *, name: str = None, idempotent: bool = None, **kwargs):
+        """Ответ без чтения тела: читать через response.iter_bytes(). Ретраи — только до начала тела,
+        латентность — до получения заголовков."""
+        name = name or f"{method} {path or '/'}"
+        attempts = self._attempts(method, idempotent)
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                request = self.client.build_request(method, self._url(path), **kwargs)
+                response = self.client.send(request, stream=True)
+            except httpx.HTTPError as e:
+                self._record(name, time.perf_counter() - start, False)
+                if not self._should_retry(attempt, attempts, error=e):
+                    raise
+            else:
+                self._record(name, time.perf_counter() - start, response.is_success)
+                if not self._should_retry(attempt, attempts, response=response):
+                    break
+                response.close()
+            time.sleep(self._retry_delay(attempt))
+
+        try:
+            yield response.raise_for_status()
+        finally:
+            response.close()
+
+    async def arequest(self, method: str, path: str = "", *, name: str = None, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """Асинхронный вариант request — не занимает поток, пока ждёт ответ"""
+        name = name or f"{method} {path or '/'}"
+        attempts = self._attempts(method, idempotent)
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                response = await self.async_client.request(method, self._url(path), **kwargs)
+            except httpx.HTTPError as e:
+                self._record(name, time.perf_counter() - start, False)
+                if not self._should_retry(attempt, attempts, error=e):
+                    raise
+            else:
+                self._record(name, time.perf_counter() - start, response.is_success)
+                if not self._should_retry(attempt, attempts, response=response):
+                    return response.raise_for_status()
+            await asyncio.sleep(self._retry_delay(attempt))
+
+
+license_api = UpstreamClient(
+    base_url=settings.LICENSE_API_URL,
+    headers={
+        "Accept": "*/*",
+        "User-Agent": "IntegrationManager",
+        "ApiKey": settings.LICENSE_API_KEY,
+    },
+    connect_timeout=settings.UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=settings.UPSTREAM_READ_TIMEOUT,
+    max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+    max_keepalive=settings.UPSTREAM_MAX_KEEPALIVE,
+    retries=settings.UPSTREAM_RETRIES,
+    backoff=settings.UPSTREAM_BACKOFF,
+)
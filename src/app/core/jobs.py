@@ -0,0 +1,115 @@
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database.database import engine, SessionLocal
+from app.database.schemas import JobRun
+from app.core.logger import logger
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobRunner:
+    """Запуск фоновых задач ровно в одном воркере.
+
+    Лидер выбирается через pg_try_advisory_lock на отдельном соединении: пока задача
+    идёт, остальные воркеры получают "busy". Если процесс упадёт, соединение закроется
+    и Postgres сам снимет блокировку. Итог каждого запуска пишется в job_runs.
+    """
+
+    @staticmethod
+    def _record(name: str, **values):
+        db = SessionLocal()
+        try:
+            stmt = pg_insert(JobRun).values(name=name, worker=WORKER_ID, **values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[JobRun.name],
+                set_={"worker": stmt.excluded.worker, **{k: getattr(stmt.excluded, k) for k in values}},
+            )
+            db.execute(stmt)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record job run {name}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def last_run(name: str):
+        db = SessionLocal()
+        try:
+            return db.get(JobRun, name)
+        finally:
+            db.close()
+
+    @staticmethod
+    def status(name: str) -> dict:
+        run = JobRunner.last_run(name)
+        if run is None:
+            return {"name": name, "status": "never"}
+        return {
+            "name": run.name,
+            "status": run.status,
+            "worker": run.worker,
+            "last_started_at": run.last_started_at,
+            "last_finished_at": run.last_finished_at,
+            "last_success_at": run.last_success_at,
+            "duration": run.duration,
+            "error": run.error,
+        }
+
+    @staticmethod
+    def run(name: str, func, min_interval: float = 0) -> dict:
+        """Выполняет func под блокировкой задачи name.
+
+        min_interval (сек) — не запускать, если другой воркер уже стартовал задачу
+        недавно: плановые запуски в разных воркерах сдвинуты по времени.
+        Возвращает {"status": "success" | "failed" | "busy" | "skipped", ...}.
+        """
+        with engine.connect() as lock_conn:
+            locked = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": f"job:{name}"}
+            ).scalar()
+            lock_conn.commit()
+            if not locked:
+                logger.info(f"Job {name} is already running in another worker")
+                return {"status": "busy"}
+
+            try:
+                if min_interval:
+                    last = JobRunner.last_run(name)
+                    if (
+                        last is not None and last.last_started_at is not None
+                        and datetime.utcnow() - last.last_started_at < timedelta(seconds=min_interval)
+                    ):
+                        return {"status": "skipped", "last_started_at": last.last_started_at}
+
+                started_at = datetime.utcnow()
+                JobRunner._record(name, status="running", last_started_at=started_at, error=None)
+                start = time.perf_counter()
+                try:
+                    result = func()
+                except Exception as e:
+                    duration = time.perf_counter() - start
+                    JobRunner._record(
+                        name, status="failed", last_finished_at=datetime.utcnow(),
+                        duration=duration, error=str(e),
+                    )
+                    logger.error(f"Job {name} failed after {duration:.2f}s: {e}")
+                    return {"status": "failed", "duration": duration, "error": str(e)}
+
+                duration = time.perf_counter() - start
+                finished_at = datetime.utcnow()
+                JobRunner._record(
+                    name, status="success", last_finished_at=finished_at,
+                    last_success_at=finished_at, duration=duration,
+                )
+                logger.info(f"Job {name} finished in {duration:.2f}s")
+                return {"status": "success", "duration": duration, "result": result}
+            finally:
+                lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": f"job:{name}"}
+                )
+                lock_conn.commit()
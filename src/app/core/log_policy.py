@@ -0,0 +1,121 @@
+import random
+import threading
+from app.core.config import settings
+from app.core.serialization import dumps
+
+# Эти заголовки не попадают в лог, даже если их добавили в LOG_HEADERS
+SECRET_HEADERS = frozenset(("authorization", "cookie", "set-cookie", "x-api-key", "proxy-authorization"))
+# Что убирается из data при превышении LOG_MAX_METADATA_BYTES — от наименее ценного
+DROP_ORDER = ("headers", "query_params", "referer", "user_agent", "device", "operating_system", "browser")
+
+
+def _split(value: str) -> tuple:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class LogPolicy:
+    """Какие запросы попадают в таблицу logs и что сохраняется в data.
+
+    Ошибки (status >= LOG_ALWAYS_STATUS) и медленные запросы пишутся всегда, успешные —
+    с долей LOG_SAMPLE_RATE. Пути вне LOG_INCLUDE_PREFIXES и из LOG_EXCLUDE_PREFIXES
+    (статика фронтенда, /metrics) пишутся только при ошибке сервера (5xx).
+    """
+
+    def __init__(
+        self,
+        include_prefixes: tuple,
+        exclude_prefixes: tuple,
+        sample_rate: float,
+        slow_threshold: float,
+        always_status: int,
+        headers: tuple,
+        max_value_length: int,
+        max_metadata_bytes: int,
+    ):
+        self.include_prefixes = include_prefixes
+        self.exclude_prefixes = exclude_prefixes
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.slow_threshold = slow_threshold
+        self.always_status = always_status
+        self.headers = frozenset(h.lower() for h in headers) - SECRET_HEADERS
+        self.max_value_length = max_value_length
+        self.max_metadata_bytes = max_metadata_bytes
+        self._lock = threading.Lock()
+        self._counts = {"kept": 0, "excluded": 0, "sampled_out": 0, "trimmed": 0}
+
+    @classmethod
+    def from_settings(cls) -> "LogPolicy":
+        return cls(
+            include_prefixes=_split(settings.LOG_INCLUDE_PREFIXES),
+            exclude_prefixes=_split(settings.LOG_EXCLUDE_PREFIXES),
+            sample_rate=settings.LOG_SAMPLE_RATE,
+            slow_threshold=settings.LOG_SLOW_THRESHOLD,
+            always_status=settings.LOG_ALWAYS_STATUS,
+            headers=_split(settings.LOG_HEADERS),
+            max_value_length=settings.LOG_MAX_VALUE_LENGTH,
+            max_metadata_bytes=settings.LOG_MAX_METADATA_BYTES,
+        )
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def excluded(self, path: str) -> bool:
+        if self.include_prefixes and not path.startswith(self.include_prefixes):
+            return True
+        return bool(self.exclude_prefixes) and path.startswith(self.exclude_prefixes)
+
+    def should_log(self, path: str, status_code: int, duration: float) -> bool:
+        """Решение о записи в БД; вызывается до сборки метаданных"""
+        if self.excluded(path):
+            keep = status_code >= 500
+            self._count("kept" if keep else "excluded")
+            return keep
+        if status_code >= self.always_status or duration >= self.slow_threshold:
+            self._count("kept")
+            return True
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self._count("kept")
+            return True
+        self._count("sampled_out")
+        return False
+
+    def sampled(self, status_code: int, duration: float) -> bool:
+        """Запись попала в лог по выборке — её вес при подсчётах 1 / sample_rate"""
+        return (
+            self.sample_rate < 1.0
+            and status_code < self.always_status
+            and duration < self.slow_threshold
+        )
+
+    def filter_headers(self, headers) -> dict:
+        return {k: self._clip(v) for k, v in headers.items() if k.lower() in self.headers}
+
+    def _clip(self, value):
+        if isinstance(value, str) and len(value) > self.max_value_length:
+            return value[:self.max_value_length] + "…"
+        return value
+
+    def trim(self, metadata: dict) -> dict:
+        """Обрезает длинные строки; если data всё ещё больше лимита — убирает поля по DROP_ORDER.
+
+        Вызывается дважды: в запросе и в log_sink после разбора User-Agent.
+        """
+        metadata = {k: self._clip(v) for k, v in metadata.items()}
+        if len(dumps(metadata)) <= self.max_metadata_bytes:
+            return metadata
+        # Пометка входит в бюджет, поэтому ставится до проверок размера
+        metadata["truncated"] = True
+        for key in DROP_ORDER:
+            metadata.pop(key, None)
+            if len(dumps(metadata)) <= self.max_metadata_bytes:
+                break
+        self._count("trimmed")
+        return metadata
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+log_policy = LogPolicy.from_settings()
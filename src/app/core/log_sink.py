@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.user_agent import enrich_user_agent
+from app.core.log_policy import log_policy
+from app.database.database import SessionLocal
+from app.database.schemas import LogEntry
+
+logger = logging.getLogger("app_logger")
+
+_STOP = object()
+
+
+class LogSink:
+    """Фоновая пакетная запись логов в БД: ограниченная очередь + отдельный поток-писатель."""
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Дописывает всё, что осталось в очереди, и останавливает поток."""
+        with self._lock:
+            thread = self._thread
+            self._closed = True
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Log sink queue is still full on shutdown, pending entries are lost")
+            return
+        thread.join(timeout)
+
+    def put(self, entry: dict):
+        """Ставит запись в очередь, не блокируя вызывающего. При переполнении запись отбрасывается."""
+        if self._closed:
+            # После остановки пишем синхронно, чтобы не терять последние записи
+            self._write([entry])
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                # Забираем всё, что успели положить до сигнала остановки
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+                if batch:
+                    self._write(batch)
+                return
+
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._write(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: list):
+        db = SessionLocal()
+        try:
+            # Разбор User-Agent вынесен сюда из обработки запроса. Лимит размера data
+            # проверяется ещё раз уже с browser / operating_system / device
+            for entry in batch:
+                enrich_user_agent(entry["data"])
+                if entry["data"]:
+                    entry["data"] = log_policy.trim(entry["data"])
+            # executemany -> многострочный INSERT ... VALUES одной командой
+            db.execute(insert(LogEntry), batch)
+            db.commit()
+            self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            self.failed += len(batch)
+            logger.error(f"Failed to log to DB: {e}")
+        finally:
+            db.close()
+
+
+log_sink = LogSink(
+    maxsize=settings.LOG_QUEUE_MAXSIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_interval=settings.LOG_FLUSH_INTERVAL,
+)
@@ -1,6 +1,6 @@
 import logging
-from app.database.database import SessionLocal
-from app.database.schemas import LogEntry
+from datetime import datetime
+from app.core.log_sink import log_sink
 
 logger = logging.getLogger("app_logger")
 logger.setLevel(logging.INFO)
@@ -10,26 +10,20 @@ console_handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(
 logger.addHandler(console_handler)
 
 def log_to_db(
-    level: str, 
-    message: str, 
-    path: str = None, 
+    level: str,
+    message: str,
+    path: str = None,
     method: str = None,
     ip_address: str = None,
     metadata: dict = None
 ):
-    db = SessionLocal()
-    try:
-        entry = LogEntry(
-            level=level, 
-            message=message, 
-            path=path, 
-            method=method,
-            ip_address=ip_address,
-            data=metadata
-        )
-        db.add(entry)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Failed to log to DB: {e}")
-    finally:
-        db.close()
\ No newline at end of file
+    """Ставит запись в очередь фоновой записи; в БД она попадает пакетом из потока log_sink."""
+    log_sink.put({
+        "level": level,
+        "message": message,
+        "path": path,
+        "method": method,
+        "ip_address": ip_address,
+        "data": metadata,
+        "created_at": datetime.utcnow(),
+    })
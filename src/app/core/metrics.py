@@ -0,0 +1,202 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+from app.core.config import settings
+
+logger = logging.getLogger("app_logger")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Series:
+    """Счётчики одной комбинации (method, route, status): интервальные бакеты + сумма + работа с БД"""
+    __slots__ = ("buckets", "count", "sum", "db_queries", "db_time")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+class RequestMetrics:
+    """Счётчики запросов и гистограммы латентности по шаблону маршрута.
+
+    Серии создаются один раз на комбинацию меток, дальше запрос только инкрементирует
+    готовые счётчики. При нескольких воркерах каждый периодически сбрасывает снимок
+    в METRICS_DIR, а /metrics суммирует снимки всех процессов.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, metrics_dir: str = None, flush_interval: float = 5.0):
+        self.buckets = tuple(buckets)
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self._series = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, method: str, route: str, status: int, seconds: float,
+                db_queries: int = 0, db_time: float = 0.0):
+        key = (method, route, status)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, _Series(len(self.buckets) + 1))
+        series.buckets[bisect.bisect_left(self.buckets, seconds)] += 1
+        series.count += 1
+        series.sum += seconds
+        series.db_queries += db_queries
+        series.db_time += db_time
+
+    def snapshot(self) -> list:
+        with self._lock:
+            items = list(self._series.items())
+        return [[*key, list(s.buckets), s.count, s.sum, s.db_queries, s.db_time] for key, s in items]
+
+    # --- агрегация между процессами ---
+
+    def _snapshot_path(self, pid: int = None) -> str:
+        return os.path.join(self.metrics_dir, f"requests_{pid or os.getpid()}.json")
+
+    def flush(self):
+        if not self.metrics_dir:
+            return
+        path = self._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"buckets": self.buckets, "series": self.snapshot()}, f)
+        os.replace(tmp_path, path)
+
+    def start(self):
+        if not self.metrics_dir or (self._thread and self._thread.is_alive()):
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.flush_interval)
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error(f"Failed to flush metrics: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Failed to flush metrics: {e}")
+
+    def _collect(self) -> dict:
+        """Сумма серий по живым процессам: свои — текущие значения, чужие — из последних снимков.
+
+        Снимки завершившихся воркеров удаляются, иначе METRICS_DIR рос бы с каждым перезапуском.
+        """
+        merged = {}
+        sources = [self.snapshot()]
+        if self.metrics_dir:
+            own_path = self._snapshot_path()
+            for path in glob.glob(os.path.join(self.metrics_dir, "requests_*.json")):
+                if path == own_path:
+                    continue
+                pid = os.path.basename(path)[len("requests_"):-len(".json")]
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if tuple(snapshot.get("buckets", ())) == self.buckets:
+                    sources.append(snapshot["series"])
+
+        for series in sources:
+            for method, route, status, buckets, count, total, *db in series:
+                # Снимки процессов до появления счётчиков БД содержат только латентность
+                db_queries, db_time = db or (0, 0.0)
+                key = (method, route, status)
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = [list(buckets), count, total, db_queries, db_time]
+                else:
+                    current[0] = [a + b for a, b in zip(current[0], buckets)]
+                    current[1] += count
+                    current[2] += total
+                    current[3] += db_queries
+                    current[4] += db_time
+        return merged
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus"""
+        lines = [
+            "# HELP http_requests_total Total HTTP requests by route template, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        merged = sorted(self._collect().items())
+        for (method, route, status), (_, count, *_) in merged:
+            lines.append(f"http_requests_total{{{_labels(method, route, status)}}} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds HTTP request duration including sending the response body.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+        for (method, route, status), (buckets, count, total, *_) in merged:
+            labels = _labels(method, route, status)
+            cumulative = 0
+            for bound, value in zip(bounds, buckets):
+                cumulative += value
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP http_request_db_queries_total SQL queries executed while handling requests.",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route, status), (*_, db_queries, _) in merged:
+            lines.append(f"http_request_db_queries_total{{{_labels(method, route, status)}}} {db_queries}")
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in SQL queries while handling requests.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route, status), (*_, db_time) in merged:
+            lines.append(f"http_request_db_seconds_total{{{_labels(method, route, status)}}} {db_time}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method, route, status) -> str:
+    return f'method="{_escape(method)}",route="{_escape(route)}",status="{status}"'
+
+
+request_metrics = RequestMetrics(
+    metrics_dir=settings.METRICS_DIR,
+    flush_interval=settings.METRICS_FLUSH_INTERVAL,
+)
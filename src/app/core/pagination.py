@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import DateTime, String, and_, or_, select, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def encode_cursor(value, row_id: int) -> str:
+    """Непрозрачный курсор: значение ключа сортировки + id последней строки страницы"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, column):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, row_id = json.loads(raw)
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def contains_pattern(value: str) -> str:
+    """Шаблон LIKE «содержит value»: % и _ в value ищутся буквально (escape='\\')"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _keyset_expr(column):
+    # Строки сравниваются побайтно (COLLATE "C") — так же, как их сортирует снимок лицензий в памяти
+    if isinstance(column.type, String):
+        return column.collate("C")
+    return column
+
+
+def order_keyset(stmt, column, id_column, descending: bool = True):
+    """Сортировка (column, id) с NULL в конце — одинакова для page- и cursor-режимов"""
+    column = _keyset_expr(column)
+    if descending:
+        return stmt.order_by(column.desc().nulls_last(), id_column.desc())
+    return stmt.order_by(column.asc().nulls_last(), id_column.asc())
+
+
+def seek_after(stmt, column, id_column, cursor: str, descending: bool = True):
+    """Условие «строго после курсора» для порядка из order_keyset — идёт по индексу вместо OFFSET"""
+    value, row_id = decode_cursor(cursor, column)
+    nullable = column.expression.nullable
+    column = _keyset_expr(column)
+    if value is None:
+        after_id = id_column < row_id if descending else id_column > row_id
+        return stmt.filter(and_(column.is_(None), after_id))
+
+    if not nullable:
+        # Явная граница по column позволяет планировщику отсечь лишние секции/диапазон индекса
+        if descending:
+            return stmt.filter(column <= value, or_(column < value, id_column < row_id))
+        return stmt.filter(column >= value, or_(column > value, id_column > row_id))
+
+    if descending:
+        condition = or_(column < value, and_(column == value, id_column < row_id), column.is_(None))
+    else:
+        condition = or_(column > value, and_(column == value, id_column > row_id), column.is_(None))
+    return stmt.filter(condition)
+
+
+async def fetch_page(db, stmt, column, limit: int, page: int = 1, cursor: str = None):
+    """Возвращает (строки, next_cursor). В cursor-режиме page игнорируется."""
+    if not cursor:
+        stmt = stmt.offset((page - 1) * limit)
+    rows = (await db.execute(stmt.limit(limit + 1))).scalars().all()
+
+    next_cursor = None
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+    return rows, next_cursor
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) над произвольным select — параметры биндятся драйвером как обычно"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_count(db, stmt) -> int:
+    """Оценка числа строк из статистики планировщика вместо COUNT(*)"""
+    plan = (await db.execute(Explain(stmt.order_by(None)))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_total(db, stmt, mode: str = "exact"):
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        return await estimate_count(db, stmt)
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await db.execute(count_stmt)).scalar_one()
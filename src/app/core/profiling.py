@@ -0,0 +1,148 @@
+import inspect
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from app.core.config import settings
+
+logger = logging.getLogger("app_logger")
+
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+TRUE_VALUES = ("1", "true", "yes")
+
+
+class RequestProfile:
+    """Профиль одного запроса по флагу X-Profile: 1 или ?profile=1 (только для админов).
+
+    Семплирующий профиль pyinstrument в HTML. pyinstrument видит только поток, в котором
+    запущен, — здесь это поток event loop, поэтому профилируются только async-обработчики.
+    Обычные def-маршруты (выгрузка, /iiko/update, задачи выгрузки) выполняются в threadpool
+    и дали бы пустой отчёт — для них профилирование отклоняется с X-Profile-Error.
+    Без pyinstrument профилирование отключено. Одновременно профилируется один запрос на процесс.
+    """
+
+    _busy = threading.Lock()
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self._profiler = None
+        self._started = 0.0
+
+    @staticmethod
+    def requested(request) -> bool:
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if not flag or flag.lower() not in TRUE_VALUES:
+            return False
+        return RequestProfile._is_admin(request)
+
+    @staticmethod
+    def _is_admin(request) -> bool:
+        # Роль берётся из подписанного токена — без похода в БД на каждом запросе
+        from fastapi import HTTPException
+        from app.auth.auth import decode_token
+        from app.auth.models.auth_models import UserRole
+
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            return decode_token(token).get("role") == UserRole.admin.value
+        except HTTPException:
+            return False
+
+    @staticmethod
+    def _sync_endpoint(app, scope) -> bool:
+        """Маршрут запроса обрабатывается обычной def-функцией (то есть в threadpool)"""
+        from starlette.routing import Match
+
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                endpoint = getattr(route, "endpoint", None)
+                return endpoint is not None and not inspect.iscoroutinefunction(endpoint)
+        return False
+
+    @classmethod
+    def begin(cls, app, scope, request):
+        """(профиль, причина отказа) для запроса с флагом профилирования; (None, None) — флага нет"""
+        if not cls.requested(request):
+            return None, None
+        if cls._sync_endpoint(app, scope):
+            return None, "sync handler runs in threadpool and cannot be sampled"
+        profile = cls.start(request.method, request.url.path)
+        if profile is None:
+            return None, "profiler unavailable or busy"
+        return profile, None
+
+    @classmethod
+    def start(cls, method: str, path: str):
+        """Запускает профилировщик; None — pyinstrument не установлен или уже профилируется другой запрос"""
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("Request profiling requested, but pyinstrument is not installed")
+            return None
+        if not cls._busy.acquire(blocking=False):
+            return None
+        profile = cls(method, path)
+        try:
+            profile._profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="enabled")
+            profile._started = time.perf_counter()
+            profile._profiler.start()
+        except Exception:
+            cls._busy.release()
+            raise
+        return profile
+
+    def stop(self):
+        """Останавливает профилировщик и сохраняет отчёт в PROFILE_DIR"""
+        try:
+            self._profiler.stop()
+            content = self._profiler.output_html()
+        finally:
+            RequestProfile._busy.release()
+
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILE_DIR, f"{self.id}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        logger.info(
+            f"Profile {self.id} saved for {self.method} {self.path} "
+            f"[{time.perf_counter() - self._started:.2f}s]"
+        )
+        self.prune()
+
+    @staticmethod
+    def _files() -> list:
+        if not os.path.isdir(settings.PROFILE_DIR):
+            return []
+        names = [n for n in os.listdir(settings.PROFILE_DIR) if PROFILE_ID_PATTERN.match(n.rsplit(".", 1)[0])]
+        return sorted(names, reverse=True)
+
+    @staticmethod
+    def prune():
+        """Оставляет PROFILE_KEEP последних отчётов"""
+        for name in RequestProfile._files()[settings.PROFILE_KEEP:]:
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def list() -> list:
+        return [{"id": name.rsplit(".", 1)[0], "format": name.rsplit(".", 1)[1]} for name in RequestProfile._files()]
+
+    @staticmethod
+    def file_path(profile_id: str):
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        for ext in ("html", "txt"):
+            path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
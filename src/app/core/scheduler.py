@@ -1,27 +1,40 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timedelta
-from app.database.database import SessionLocal
-from app.core.logger import LogEntry, logger
+from app.core.config import settings
+from app.core.jobs import JobRunner
+from app.core.logger import logger
+from app.logs.controllers.logs_scheduler import LogsScheduler
 from app.iiko.controllers.iiko_scheduler import IikoScheduler
+from app.iiko.controllers.export_jobs import ExportJobs
+
+LOG_MAINTENANCE_JOB = "logs_maintenance"
+LICENSE_SYNC_JOB = "iiko_license_sync"
+
+# Доля интервала: если другой воркер запускал задачу позже, плановый запуск пропускается
+MIN_INTERVAL_RATIO = 0.9
 
 def cleanup_old_logs():
-    """Удаляет логи старше 7 дней"""
-    db = SessionLocal()
-    week_ago = datetime.now() - timedelta(days=7)
-    try:
-        deleted = db.query(LogEntry).filter(LogEntry.created_at < week_ago).delete()
-        db.commit()
-        logger.info(f"Cleared {deleted} old log entries")
-    except Exception as e:
-        logger.error(f"Error cleaning logs: {e}")
-    finally:
-        db.close()
+    """Создаёт секции logs на ближайшие дни и удаляет секции старше LOG_RETENTION_DAYS"""
+    JobRunner.run(
+        LOG_MAINTENANCE_JOB,
+        LogsScheduler.maintain_partitions,
+        min_interval=settings.LOG_MAINTENANCE_INTERVAL_HOURS * 3600 * MIN_INTERVAL_RATIO,
+    )
         
 def update_iiko_licenses_job():
     logger.info("Обновление лицензий iiko...")
-    IikoScheduler.update_licenses()
+    JobRunner.run(
+        LICENSE_SYNC_JOB,
+        IikoScheduler.update_licenses,
+        min_interval=settings.LICENSE_SYNC_INTERVAL_MINUTES * 60 * MIN_INTERVAL_RATIO,
+    )
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(cleanup_old_logs, "interval", days=7)
-scheduler.add_job(update_iiko_licenses_job, "interval", hours=1)
+def cleanup_export_jobs():
+    """Файлы выгрузок лежат локально, поэтому чистка — в каждом воркере, без блокировки"""
+    removed = ExportJobs.cleanup()
+    if removed:
+        logger.info(f"Removed {removed} expired license exports")
 
+scheduler = BackgroundScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+scheduler.add_job(cleanup_old_logs, "interval", hours=settings.LOG_MAINTENANCE_INTERVAL_HOURS)
+scheduler.add_job(update_iiko_licenses_job, "interval", minutes=settings.LICENSE_SYNC_INTERVAL_MINUTES)
+scheduler.add_job(cleanup_export_jobs, "interval", minutes=10)
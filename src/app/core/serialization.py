@@ -0,0 +1,30 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# Нестроковые ключи словарей и numpy-значения (снимок лицензий) сериализуются как есть
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    # Как default=str у json.dumps: Decimal и прочие редкие типы — строкой
+    return str(value)
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+
+def dumps_str(value) -> str:
+    """Для json_serializer движков SQLAlchemy — драйверам нужен str"""
+    return dumps(value).decode("utf-8")
+
+
+loads = orjson.loads
+
+
+class FastJSONResponse(ORJSONResponse):
+    """Ответ через orjson. Возврат его напрямую из маршрута минует jsonable_encoder —
+    для данных, которые уже состоят из dict/list/str/числа/datetime."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
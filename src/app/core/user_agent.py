@@ -0,0 +1,21 @@
+from functools import lru_cache
+from app.core.config import settings
+
+@lru_cache(maxsize=settings.UA_CACHE_SIZE)
+def describe_user_agent(user_agent: str) -> tuple:
+    """(браузер, ОС, устройство) по строке User-Agent. Одни и те же UA повторяются, поэтому результат кэшируется."""
+    from user_agents import parse
+
+    parsed = parse(user_agent)
+    browser = f"{parsed.browser.family} {parsed.browser.version_string}"
+    operating_system = f"{parsed.os.family} {parsed.os.version_string}"
+    return browser, operating_system, parsed.device.family
+
+def enrich_user_agent(metadata: dict):
+    """Дополняет метаданные запроса разобранным User-Agent (вызывается в фоновом потоке записи логов)"""
+    if not metadata or "user_agent" not in metadata or "browser" in metadata:
+        return
+    browser, operating_system, device = describe_user_agent(metadata["user_agent"] or "")
+    metadata["browser"] = browser
+    metadata["operating_system"] = operating_system
+    metadata["device"] = device
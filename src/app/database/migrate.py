@@ -0,0 +1,66 @@
+"""Схема БД и начальные данные — отдельным шагом перед запуском воркеров.
+
+    cd src && python -m app.database.migrate           # таблицы, миграции, секции logs, пользователи
+    cd src && python -m app.database.migrate --check   # код 1, если схема не актуальна
+"""
+import argparse
+import sys
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.logger import logger
+from app.database.database import Base, engine
+from app.database import schemas  # noqa: F401 — регистрирует таблицы в Base.metadata
+from app.database.migrations import run_migrations, pending_migrations
+
+
+def migrate(seed: bool = True):
+    from app.logs.controllers.logs_scheduler import LogsScheduler
+    from app.seeders.seed_admin import run_seed
+
+    # migrate запускают все реплики и (с SCHEMA_AUTO_MIGRATE) все воркеры: шаги выполняет
+    # один процесс, остальные ждут и затем находят схему готовой. Ключ отличается от
+    # schema_migrations, который run_migrations и ensure_partitions берут на своих соединениях.
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(hashtext('schema_migrate'))"))
+        try:
+            Base.metadata.create_all(bind=engine)
+            run_migrations()
+            LogsScheduler.ensure_partitions()
+            if seed:
+                run_seed()
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext('schema_migrate'))"))
+
+
+def ensure_schema():
+    """Проверка при старте воркера: одна лёгкая выборка вместо create_all и миграций"""
+    pending = pending_migrations()
+    if not pending:
+        return
+    if settings.SCHEMA_AUTO_MIGRATE:
+        logger.info(f"Applying pending schema changes on startup: {', '.join(pending)}")
+        migrate(seed=False)
+        return
+    raise RuntimeError(
+        f"Database schema is not up to date ({', '.join(pending)}); run `python -m app.database.migrate`"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="только проверить, есть ли неприменённые изменения")
+    parser.add_argument("--no-seed", action="store_true", help="не создавать пользователей по умолчанию")
+    args = parser.parse_args()
+
+    if args.check:
+        pending = pending_migrations()
+        for name in pending:
+            print(f"pending: {name}")
+        sys.exit(1 if pending else 0)
+
+    migrate(seed=not args.no_seed)
+    print("schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from sqlalchemy import text
+from app.database.database import engine
+from app.core.logger import logger
+
+def _backfill_license_columns(conn):
+    """Заполняет типизированные поля лицензий из уже сохранённого JSON"""
+    from app.iiko.controllers.iiko_scheduler import IikoScheduler
+
+    rows = conn.execute(text("SELECT id, data FROM licenses_iiko")).all()
+    updates = [{"id": row_id, **IikoScheduler.license_columns(data)} for row_id, data in rows]
+    if updates:
+        conn.execute(text(
+            "UPDATE licenses_iiko SET organization_id = :organization_id, organization_name = :organization_name, "
+            "license_code = :license_code, is_active = :is_active, is_online = :is_online, "
+            "last_request_date = :last_request_date, expiration_date = :expiration_date, "
+            "search_text = :search_text WHERE id = :id"
+        ), updates)
+
+def _partition_logs(conn):
+    """Переводит logs в секционированную по дням таблицу; переносятся только строки в пределах срока хранения"""
+    from app.core.config import settings
+    from app.database.schemas import LogEntry
+    from app.logs.controllers.logs_scheduler import LogsScheduler
+
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('logs')")).scalar()
+    if relkind != "p":
+        conn.execute(text("ALTER TABLE logs RENAME TO logs_legacy"))
+        conn.execute(text("ALTER SEQUENCE IF EXISTS logs_id_seq RENAME TO logs_legacy_id_seq"))
+        conn.execute(text("ALTER TABLE logs_legacy DROP CONSTRAINT IF EXISTS logs_pkey"))
+        for index in ("ix_logs_id", "ix_logs_level", "ix_logs_ip_address", "ix_logs_created_at_id"):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+        LogEntry.__table__.create(bind=conn)
+        LogsScheduler.ensure_partitions(conn, days_back=settings.LOG_RETENTION_DAYS)
+        conn.execute(text(
+            "INSERT INTO logs (id, level, message, path, method, ip_address, data, created_at) "
+            "SELECT id, level, message, path, method, ip_address, data, created_at FROM logs_legacy "
+            "WHERE created_at >= now() AT TIME ZONE 'utc' - make_interval(days => :days)"
+        ), {"days": settings.LOG_RETENTION_DAYS})
+        conn.execute(text("SELECT setval(pg_get_serial_sequence('logs', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM logs"))
+        conn.execute(text("DROP TABLE logs_legacy"))
+    else:
+        LogsScheduler.ensure_partitions(conn)
+
+# Упорядоченный список миграций: (имя, шаги). Шаг — SQL-строка или функция от connection.
+# create_all создаёт только отсутствующие таблицы, поэтому изменения существующих таблиц живут здесь.
+MIGRATIONS = [
+    ("0001_license_sync_keys", [
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS license_id VARCHAR",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS data_hash VARCHAR(40)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_licenses_iiko_license_id ON licenses_iiko (license_id)",
+    ]),
+    ("0002_license_typed_columns", [
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS organization_id VARCHAR",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS organization_name VARCHAR",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS license_code VARCHAR",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT false",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS is_online BOOLEAN",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS last_request_date TIMESTAMP WITH TIME ZONE",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS expiration_date TIMESTAMP WITH TIME ZONE",
+        "ALTER TABLE licenses_iiko ADD COLUMN IF NOT EXISTS search_text TEXT",
+        _backfill_license_columns,
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_updated_at ON licenses_iiko (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_organization_id ON licenses_iiko (organization_id)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_organization_name ON licenses_iiko (organization_name)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_is_active ON licenses_iiko (is_active)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_is_online ON licenses_iiko (is_online)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_last_request_date ON licenses_iiko (last_request_date)",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_expiration_date ON licenses_iiko (expiration_date)",
+        # Подстрочный поиск (ILIKE '%...%') по search_text
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_licenses_iiko_search_text_trgm "
+        "ON licenses_iiko USING gin (search_text gin_trgm_ops)",
+    ]),
+    ("0003_logs_keyset_index", [
+        "CREATE INDEX IF NOT EXISTS ix_logs_created_at_id ON logs (created_at, id)",
+    ]),
+    ("0004_logs_partitioning", [
+        _partition_logs,
+    ]),
+    ("0005_license_organization_c_collation", [
+        # Сортировка по организации идёт в COLLATE "C" (как в снимке лицензий)
+        'CREATE INDEX IF NOT EXISTS ix_licenses_iiko_organization_name_c '
+        'ON licenses_iiko (organization_name COLLATE "C")',
+    ]),
+]
+
+def run_migrations():
+    """Применяет ещё не применённые миграции, каждую — ровно один раз"""
+    with engine.begin() as conn:
+        # Воркеры стартуют одновременно — миграции применяет тот, кто первым взял блокировку
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+        # Перенос и заполнение данных может идти дольше обычного statement_timeout
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+        for name, steps in MIGRATIONS:
+            if name in applied:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+            logger.info(f"Applied migration {name}")
+
+def pending_migrations() -> list:
+    """Отсутствующие таблицы и неприменённые миграции — дешёвая проверка без DDL и блокировок"""
+    from app.database.database import Base
+
+    with engine.connect() as conn:
+        tables = list(Base.metadata.tables) + ["schema_migrations"]
+        existing = conn.execute(
+            text("SELECT name FROM unnest(CAST(:names AS text[])) AS name WHERE to_regclass(name) IS NOT NULL"),
+            {"names": tables},
+        ).scalars().all()
+        missing = [f"table {name}" for name in tables if name not in existing]
+        applied = set()
+        if "schema_migrations" in existing:
+            applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+    return missing + [name for name, _ in MIGRATIONS if name not in applied]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, JSON, func
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, JSON, Boolean, Float, Index, func
 from datetime import datetime
 from .database import Base
 import enum
@@ -19,18 +19,50 @@ class User(Base):
 class LogEntry(Base):
     __tablename__ = "logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Таблица секционирована по дням (RANGE по created_at), поэтому created_at входит в первичный ключ
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     level = Column(String, index=True)
     message = Column(Text)
     path = Column(String, nullable=True)
     method = Column(String, nullable=True)
     ip_address = Column(String, nullable=True, index=True)  
     data = Column(JSON, nullable=True)  
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Порядок выдачи /logs: created_at DESC, id DESC (page- и cursor-режимы)
+        Index("ix_logs_created_at_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
 class LicenseIiko(Base):
     __tablename__ = "licenses_iiko"
 
     id = Column(Integer, primary_key=True, index=True)
+    license_id = Column(String, unique=True, index=True, nullable=True)  # data['license']['id']
     data = Column(JSON, nullable=False)  
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    data_hash = Column(String(40), nullable=True)  # sha1 от data, для инкрементальной синхронизации
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+
+    # Поля из data['license'], заполняются при синхронизации — по ним фильтруем и сортируем
+    organization_id = Column(String, nullable=True, index=True)
+    organization_name = Column(String, nullable=True, index=True)
+    license_code = Column(String, nullable=True)
+    is_active = Column(Boolean, nullable=False, server_default="false", index=True)
+    is_online = Column(Boolean, nullable=True, index=True)
+    last_request_date = Column(DateTime(timezone=True), nullable=True, index=True)
+    expiration_date = Column(DateTime(timezone=True), nullable=True, index=True)
+    search_text = Column(Text, nullable=True)  # name + licenseCode + organizationId в нижнем регистре, trigram-индекс
+
+class JobRun(Base):
+    """Последний запуск фоновой задачи — общий для всех воркеров"""
+    __tablename__ = "job_runs"
+
+    name = Column(String, primary_key=True)
+    status = Column(String, nullable=False)
+    worker = Column(String)
+    last_started_at = Column(DateTime)
+    last_finished_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    duration = Column(Float)
+    error = Column(Text)
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import func
+from app.database.database import SessionLocal
+from app.database.schemas import LicenseIiko
+from app.core.config import settings
+from app.core.logger import logger
+from app.iiko.controllers.iiko_controller import IikoController
+from app.iiko.controllers.license_snapshot import license_snapshots
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{24}$")
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class ExportJobs:
+    """Фоновая выгрузка лицензий: задача -> файл в EXPORT_SPOOL_DIR + статус в {id}.json рядом.
+
+    id задачи — хеш (формат, фильтры, отпечаток таблицы лицензий), поэтому повторная
+    выгрузка тех же данных возвращает уже готовый файл. Статус лежит в файле, так что
+    его видит любой воркер того же хоста.
+    """
+
+    spool_dir = settings.EXPORT_SPOOL_DIR
+    ttl = settings.EXPORT_JOB_TTL
+    PROGRESS_EVERY = 1000
+
+    _executor = None
+    _lock = threading.Lock()
+    # Незавершённые задачи этого процесса: id -> статус
+    _active = {}
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export"
+                    )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        # Иначе клиенты опрашивали бы задачи, которые уже никто не выполнит
+        with cls._lock:
+            jobs = list(cls._active.values())
+            cls._active.clear()
+        for job in jobs:
+            job.update(status="failed", error="Воркер остановлен до завершения выгрузки", updated_at=time.time())
+            cls._write_status(job)
+
+    # --- файлы спула ---
+
+    @classmethod
+    def _status_path(cls, job_id: str) -> str:
+        return os.path.join(cls.spool_dir, f"{job_id}.json")
+
+    @classmethod
+    def _artifact_path(cls, job_id: str, fmt: str) -> str:
+        return os.path.join(cls.spool_dir, f"{job_id}.{fmt}")
+
+    @classmethod
+    def _read_status(cls, job_id: str):
+        try:
+            with open(cls._status_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def _write_status(cls, status: dict):
+        path = cls._status_path(status["id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(status, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def _claim(cls, status: dict) -> bool:
+        """Атомарно создаёт файл статуса; False — задачу уже создал другой запрос или воркер"""
+        try:
+            fd = os.open(cls._status_path(status["id"]), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump(status, f, ensure_ascii=False)
+        return True
+
+    @classmethod
+    def _remove(cls, job_id: str, fmt: str):
+        for path in (cls._artifact_path(job_id, fmt), cls._status_path(job_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def _is_expired(cls, status: dict) -> bool:
+        return time.time() - status.get("updated_at", 0) > cls.ttl
+
+    @classmethod
+    def _is_orphaned(cls, status: dict) -> bool:
+        """Задача в очереди или в работе, но её воркер завершился или перезапустился"""
+        pid = status.get("pid")
+        if status["status"] not in ACTIVE_STATUSES or pid is None:
+            return False
+        if pid == os.getpid():
+            return status["id"] not in cls._active
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    @classmethod
+    def _fail_orphaned(cls, status: dict) -> dict:
+        status.update(status="failed", error="Воркер завершился до окончания выгрузки", updated_at=time.time())
+        cls._write_status(status)
+        return status
+
+    # --- API ---
+
+    @staticmethod
+    def job_id(fmt: str, filters: dict, fingerprint) -> str:
+        payload = json.dumps([fmt, filters, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:24]
+
+    @classmethod
+    def submit(cls, fmt: str, search: str = None, status: str = None, organization_id: str = None,
+               is_online: bool = None) -> dict:
+        """Ставит выгрузку в очередь или возвращает существующую задачу для тех же данных"""
+        IikoController.export_writer(fmt)
+        os.makedirs(cls.spool_dir, exist_ok=True)
+
+        filters = {"search": search, "status": status, "organization_id": organization_id, "is_online": is_online}
+        job_id = cls.job_id(fmt, filters, license_snapshots.fingerprint())
+
+        existing = cls._read_status(job_id)
+        if existing is not None:
+            reusable = (
+                (existing["status"] in ACTIVE_STATUSES and not cls._is_orphaned(existing))
+                or (existing["status"] == "done" and os.path.exists(cls._artifact_path(job_id, fmt)))
+            )
+            if reusable and not cls._is_expired(existing):
+                return existing
+            cls._remove(job_id, fmt)
+
+        now = time.time()
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "format": fmt,
+            "filters": filters,
+            "rows": 0,
+            "total": None,
+            "progress": 0.0,
+            "error": None,
+            "filename": f"iiko_licenses_{datetime.now():%Y%m%d_%H%M%S}.{fmt}",
+            "pid": os.getpid(),
+            "created_at": now,
+            "updated_at": now,
+        }
+        if not cls._claim(job):
+            return cls._read_status(job_id) or job
+        with cls._lock:
+            cls._active[job_id] = job
+        cls._get_executor().submit(cls._run, job)
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> dict:
+        status = cls._read_status(job_id) if JOB_ID_PATTERN.match(job_id) else None
+        if status is None:
+            raise HTTPException(status_code=404, detail="Задача выгрузки не найдена")
+        if cls._is_orphaned(status):
+            return cls._fail_orphaned(status)
+        return status
+
+    @classmethod
+    def artifact(cls, job_id: str):
+        """(путь к файлу, имя для скачивания, media type) готовой выгрузки"""
+        status = cls.get(job_id)
+        if status["status"] != "done":
+            raise HTTPException(status_code=409, detail=f"Выгрузка ещё не готова: {status['status']}")
+        path = cls._artifact_path(job_id, status["format"])
+        if not os.path.exists(path):
+            raise HTTPException(status_code=410, detail="Файл выгрузки удалён по сроку хранения")
+        return path, status["filename"], IikoController.EXPORT_MEDIA_TYPES[status["format"]]
+
+    @classmethod
+    def cleanup(cls) -> int:
+        """Удаляет выгрузки и статусы старше EXPORT_JOB_TTL (и зависшие задачи упавших воркеров)"""
+        if not os.path.isdir(cls.spool_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(cls.spool_dir):
+            if name.endswith((".part", ".tmp")):
+                # Недописанные файлы воркеров, завершившихся посреди выгрузки
+                path = os.path.join(cls.spool_dir, name)
+                try:
+                    if time.time() - os.path.getmtime(path) > cls.ttl:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            job_id, _, ext = name.partition(".")
+            if ext != "json" or not JOB_ID_PATTERN.match(job_id):
+                continue
+            status = cls._read_status(job_id)
+            if status is not None and cls._is_expired(status):
+                cls._remove(job_id, status.get("format", ""))
+                removed += 1
+        return removed
+
+    # --- выполнение ---
+
+    @staticmethod
+    def _count(filters: dict) -> int:
+        db = SessionLocal()
+        try:
+            query = IikoController._apply_filters(db.query(func.count(LicenseIiko.id)), **filters)
+            return query.scalar()
+        finally:
+            db.close()
+
+    @classmethod
+    def _run(cls, job: dict):
+        fmt = job["format"]
+        path = cls._artifact_path(job["id"], fmt)
+        part_path = f"{path}.part"
+        start = time.perf_counter()
+        try:
+            job.update(status="running", total=cls._count(job["filters"]), updated_at=time.time())
+            cls._write_status(job)
+
+            def tracked(items):
+                for item in items:
+                    yield item
+                    job["rows"] += 1
+                    if job["rows"] % cls.PROGRESS_EVERY == 0:
+                        job["progress"] = round(min(job["rows"] / job["total"], 1.0), 3) if job["total"] else 0.0
+                        job["updated_at"] = time.time()
+                        cls._write_status(job)
+
+            writer = IikoController.export_writer(fmt)
+            with open(part_path, "wb") as output:
+                for chunk in writer(tracked(IikoController.iter_licenses_data(**job["filters"]))):
+                    output.write(chunk)
+            os.replace(part_path, path)
+
+            job.update(status="done", progress=1.0, updated_at=time.time())
+            logger.info(f"Export {job['id']} ({fmt}) done: {job['rows']} rows [{time.perf_counter() - start:.2f}s]")
+        except Exception as e:
+            job.update(status="failed", error=str(e), updated_at=time.time())
+            logger.error(f"Export {job['id']} failed: {e}")
+            try:
+                os.remove(part_path)
+            except FileNotFoundError:
+                pass
+        with cls._lock:
+            if cls._active.pop(job["id"], None) is None:
+                # shutdown уже пометил задачу как прерванную
+                return
+        cls._write_status(job)
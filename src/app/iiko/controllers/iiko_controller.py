@@ -1,19 +1,60 @@
-import requests
+import asyncio
+import httpx
 from fastapi import HTTPException
-from sqlalchemy import and_, or_, func, text
-from app.database.database import SessionLocal
+from sqlalchemy import select
+from app.database.database import SessionLocal, AsyncSessionLocal
+import csv
 import io
-import pandas as pd
+import tempfile
 from datetime import datetime
 from app.database.schemas import LicenseIiko
 from app.core.logger import logger, log_to_db
+from app.core.http_client import license_api
+from app.core.cache import TTLCache, SingleFlight, MISSING
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.core.pagination import contains_pattern, count_total, order_keyset, seek_after, fetch_page
+from app.iiko.controllers.license_snapshot import license_snapshots
 
 class IikoController:
-    API_URL = "https://api.lm.gosu.kz/license"
-    API_KEY = "liErLyguNEOLOwPOLINIteRFloGAgEackWaRSONiaHLocrECTa"
+    # Кэш результатов /license/verify: ключ (license_code, ap_uid)
+    verify_cache = TTLCache(maxsize=settings.VERIFY_CACHE_SIZE, ttl=settings.VERIFY_CACHE_TTL)
+    verify_flight = SingleFlight()
+
+    SORT_COLUMNS = {
+        "organization": LicenseIiko.organization_name,
+        "status": LicenseIiko.is_active,
+        "lastRequestDate": LicenseIiko.last_request_date,
+        "expirationDate": LicenseIiko.expiration_date,
+        "updated_at": LicenseIiko.updated_at,
+    }
 
     @staticmethod
-    def get_licenses(
+    def _apply_filters(query, search=None, status=None, organization_id=None, is_online=None):
+        """Фильтры по типизированным (индексированным) полям LicenseIiko"""
+        # Поиск по организации или коду лицензии (trigram-индекс по search_text)
+        if search:
+            # % и _ — буквальные символы, как в поиске по снимку
+            query = query.filter(LicenseIiko.search_text.ilike(contains_pattern(search), escape="\\"))
+
+        # Фильтр по статусу
+        if status == 'active':
+            query = query.filter(LicenseIiko.is_active.is_(True))
+        elif status == 'expired':
+            query = query.filter(LicenseIiko.is_active.is_(False))
+
+        # Фильтр по организации
+        if organization_id:
+            query = query.filter(LicenseIiko.organization_id == organization_id)
+
+        # Фильтр по онлайн статусу
+        if is_online is not None:
+            query = query.filter(LicenseIiko.is_online.is_(is_online))
+
+        return query
+
+    @staticmethod
+    async def get_licenses(
         page: int = 1,
         limit: int = 10,
         search: str = None,
@@ -21,221 +62,201 @@ class IikoController:
         organization_id: str = None,
         is_online: bool = None,
         sort_by: str = "updated_at",
-        sort_order: str = "desc"
+        sort_order: str = "desc",
+        after: str = None,
+        count: str = "exact",
+        snapshot=None
     ):
+        if snapshot is None and settings.LICENSE_SNAPSHOT_ENABLED:
+            snapshot = await license_snapshots.get()
+        if snapshot is not None:
+            # Основной путь — снимок в памяти; БД остаётся запасным вариантом
+            result = snapshot.query(
+                page, limit, search, status, organization_id, is_online,
+                sort_by, sort_order, after, count,
+            )
+            if result is not None:
+                return result
+
+        async with AsyncSessionLocal() as db:
+            try:
+                # Базовый запрос
+                stmt = select(LicenseIiko)
+                
+                stmt = IikoController._apply_filters(stmt, search, status, organization_id, is_online)
+                
+                # Общее количество: точное, оценка планировщика или без подсчёта
+                total = await count_total(db, stmt, count)
+                
+                # Сортировка (с id для стабильного порядка и курсоров)
+                sort_column = IikoController.SORT_COLUMNS.get(sort_by, LicenseIiko.updated_at)
+                descending = sort_order != "asc"
+                stmt = order_keyset(stmt, sort_column, LicenseIiko.id, descending)
+                if after:
+                    stmt = seek_after(stmt, sort_column, LicenseIiko.id, after, descending)
+                
+                # Пагинация: OFFSET по page или keyset по курсору after
+                licenses, next_cursor = await fetch_page(db, stmt, sort_column, limit, page, after)
+                
+                result = [l.data for l in licenses]
+                return {
+                    "page": page,
+                    "limit": limit,
+                    "total": total,
+                    "items": result,
+                    "next_cursor": next_cursor,
+                }
+            except Exception as e:
+                print(f"Error in get_licenses: {str(e)}")
+                raise
+
+    # Колонки выгрузки и их ширина в Excel (в write-only режиме ширину задаём заранее)
+    EXPORT_COLUMNS = [
+        ('ID организации', 38),
+        ('Название организации', 40),
+        ('Код лицензии', 40),
+        ('Продукт', 12),
+        ('Подписка', 26),
+        ('AP ID', 38),
+        ('Статус', 10),
+        ('Онлайн', 8),
+        ('Включена', 10),
+        ('Дата генерации', 18),
+        ('Последний запрос', 18),
+        ('Истекает', 18),
+        ('ID лицензии', 38),
+    ]
+    EXPORT_MEDIA_TYPES = {
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson",
+    }
+    EXPORT_BATCH_SIZE = 1000
+    EXPORT_CHUNK_SIZE = 64 * 1024
+
+    @staticmethod
+    def _format_date(value):
+        if not value:
+            return ''
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%d.%m.%Y %H:%M')
+        except (ValueError, AttributeError):
+            return value
+
+    @staticmethod
+    def _export_row(license_item: dict) -> list:
+        """Строка таблицы в порядке EXPORT_COLUMNS"""
+        license = license_item.get('license', {})
+        org = license.get('organization', {})
+        return [
+            license.get('organizationId', ''),
+            org.get('name', ''),
+            license.get('licenseCode', ''),
+            license.get('productName', ''),
+            license.get('productSubName', ''),
+            license.get('apUId', ''),
+            'Активна' if license.get('isActive') else 'Истекла',
+            'Да' if license.get('isOnline') else 'Нет',
+            'Да' if license.get('isEnabled') else 'Нет',
+            IikoController._format_date(license.get('generateDate', '')),
+            IikoController._format_date(license.get('lastRequestDate', '')),
+            IikoController._format_date(license.get('licenseExpirationDate', '')),
+            license.get('id', ''),
+        ]
+
+    @staticmethod
+    def iter_licenses_data(search: str = None, status: str = None, organization_id: str = None, is_online: bool = None):
+        """Читает data лицензий серверным курсором пачками, не загружая всю выборку в память"""
         db = SessionLocal()
         try:
-            # Базовый запрос
-            query = db.query(LicenseIiko)
-            
-            # Поиск по организации или коду лицензии
-            if search:
-                # Используем text() для JSON поиска
-                search_condition = text(
-                    "data->'license'->'organization'->>'name' ILIKE :search OR "
-                    "data->'license'->>'licenseCode' ILIKE :search OR "
-                    "data->'license'->>'organizationId' ILIKE :search"
-                )
-                query = query.filter(search_condition.bindparams(search=f"%{search}%"))
-            
-            # Фильтр по статусу
-            if status and status != 'all':
-                if status == 'active':
-                    status_condition = text("data->'license'->>'isActive' = 'true'")
-                    query = query.filter(status_condition)
-                elif status == 'expired':
-                    status_condition = text(
-                        "data->'license'->>'isActive' = 'false' OR "
-                        "data->'license'->>'isActive' IS NULL"
-                    )
-                    query = query.filter(status_condition)
-            
-            # Фильтр по организации
-            if organization_id:
-                org_condition = text("data->'license'->>'organizationId' = :org_id")
-                query = query.filter(org_condition.bindparams(org_id=organization_id))
-            
-            # Фильтр по онлайн статусу
-            if is_online is not None:
-                online_value = 'true' if is_online else 'false'
-                online_condition = text("data->'license'->>'isOnline' = :online_val")
-                query = query.filter(online_condition.bindparams(online_val=online_value))
-            
-            # Получаем общее количество
-            total = query.count()
-            
-            # Сортировка
-            if sort_by and sort_order:
-                if sort_by == "organization":
-                    order_clause = text("data->'license'->'organization'->>'name'")
-                elif sort_by == "status":
-                    order_clause = text("data->'license'->>'isActive'")
-                elif sort_by == "lastRequestDate":
-                    order_clause = text("data->'license'->>'lastRequestDate'")
-                elif sort_by == "expirationDate":
-                    order_clause = text("data->'license'->>'licenseExpirationDate'")
-                else:
-                    order_clause = LicenseIiko.updated_at
-                
-                if sort_order == "desc":
-                    query = query.order_by(order_clause.desc())
-                else:
-                    query = query.order_by(order_clause.asc())
-            else:
-                query = query.order_by(LicenseIiko.updated_at.desc())
-            
-            # Пагинация
-            licenses = query.offset((page - 1) * limit).limit(limit).all()
-            
-            result = [l.data for l in licenses]
-            return {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "items": result,
-            }
-        except Exception as e:
-            print(f"Error in get_licenses: {str(e)}")
-            raise
+            query = db.query(LicenseIiko.data)
+            query = IikoController._apply_filters(query, search, status, organization_id, is_online)
+            query = query.order_by(LicenseIiko.updated_at.desc(), LicenseIiko.id.desc())
+            for (data,) in query.execution_options(yield_per=IikoController.EXPORT_BATCH_SIZE):
+                yield data
         finally:
             db.close()
 
     @staticmethod
-    def export_licenses_to_excel(
+    def _write_csv(items):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM — чтобы Excel открыл UTF-8 с кириллицей корректно
+        buffer.write('\ufeff')
+        writer.writerow([name for name, _ in IikoController.EXPORT_COLUMNS])
+        for item in items:
+            writer.writerow(IikoController._export_row(item))
+            if buffer.tell() >= IikoController.EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _write_ndjson(items):
+        chunk = []
+        size = 0
+        for item in items:
+            line = dumps(item) + b'\n'
+            chunk.append(line)
+            size += len(line)
+            if size >= IikoController.EXPORT_CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        yield b''.join(chunk)
+
+    @staticmethod
+    def _write_xlsx(items):
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        # write-only: строки сразу уходят во временный файл, а не держатся в памяти
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Лицензии iiko')
+        for index, (_, width) in enumerate(IikoController.EXPORT_COLUMNS, start=1):
+            worksheet.column_dimensions[get_column_letter(index)].width = width
+        worksheet.append([name for name, _ in IikoController.EXPORT_COLUMNS])
+        for item in items:
+            worksheet.append(IikoController._export_row(item))
+
+        with tempfile.TemporaryFile() as output:
+            workbook.save(output)
+            output.seek(0)
+            while chunk := output.read(IikoController.EXPORT_CHUNK_SIZE):
+                yield chunk
+
+    @staticmethod
+    def export_writer(fmt: str):
+        """Функция items -> итератор байтов для формата выгрузки"""
+        writers = {
+            "xlsx": IikoController._write_xlsx,
+            "csv": IikoController._write_csv,
+            "ndjson": IikoController._write_ndjson,
+        }
+        if fmt not in writers:
+            raise HTTPException(status_code=400, detail=f"Неизвестный формат выгрузки: {fmt}")
+        return writers[fmt]
+
+    @staticmethod
+    def export_licenses(
+        fmt: str = "xlsx",
         search: str = None,
         status: str = None,
         organization_id: str = None,
         is_online: bool = None
     ):
-        db = SessionLocal()
-        try:
-            # Базовый запрос (аналогично get_licenses но без пагинации)
-            query = db.query(LicenseIiko)
-            
-            if search:
-                search_condition = text(
-                    "data->'license'->'organization'->>'name' ILIKE :search OR "
-                    "data->'license'->>'licenseCode' ILIKE :search OR "
-                    "data->'license'->>'organizationId' ILIKE :search"
-                )
-                query = query.filter(search_condition.bindparams(search=f"%{search}%"))
-            
-            if status and status != 'all':
-                if status == 'active':
-                    status_condition = text("data->'license'->>'isActive' = 'true'")
-                    query = query.filter(status_condition)
-                elif status == 'expired':
-                    status_condition = text(
-                        "data->'license'->>'isActive' = 'false' OR "
-                        "data->'license'->>'isActive' IS NULL"
-                    )
-                    query = query.filter(status_condition)
-            
-            if organization_id:
-                org_condition = text("data->'license'->>'organizationId' = :org_id")
-                query = query.filter(org_condition.bindparams(org_id=organization_id))
-            
-            if is_online is not None:
-                online_value = 'true' if is_online else 'false'
-                online_condition = text("data->'license'->>'isOnline' = :online_val")
-                query = query.filter(online_condition.bindparams(online_val=online_value))
-            
-            licenses = query.order_by(LicenseIiko.updated_at.desc()).all()
-            licenses_data = [l.data for l in licenses]
-            
-            # Преобразуем данные для Excel
-            excel_data = []
-            for license_item in licenses_data:
-                license = license_item.get('license', {})
-                org = license.get('organization', {})
-                
-                # Форматируем даты
-                generate_date = license.get('generateDate', '')
-                last_request_date = license.get('lastRequestDate', '')
-                expiration_date = license.get('licenseExpirationDate', '')
-                
-                if generate_date:
-                    try:
-                        generate_date = datetime.fromisoformat(generate_date.replace('Z', '+00:00')).strftime('%d.%m.%Y %H:%M')
-                    except:
-                        pass
-                
-                if last_request_date:
-                    try:
-                        last_request_date = datetime.fromisoformat(last_request_date.replace('Z', '+00:00')).strftime('%d.%m.%Y %H:%M')
-                    except:
-                        pass
-                
-                if expiration_date:
-                    try:
-                        expiration_date = datetime.fromisoformat(expiration_date.replace('Z', '+00:00')).strftime('%d.%m.%Y %H:%M')
-                    except:
-                        pass
-                
-                excel_data.append({
-                    'ID организации': license.get('organizationId', ''),
-                    'Название организации': org.get('name', ''),
-                    'Код лицензии': license.get('licenseCode', ''),
-                    'Продукт': license.get('productName', ''),
-                    'Подписка': license.get('productSubName', ''),
-                    'AP ID': license.get('apUId', ''),
-                    'Статус': 'Активна' if license.get('isActive') else 'Истекла',
-                    'Онлайн': 'Да' if license.get('isOnline') else 'Нет',
-                    'Включена': 'Да' if license.get('isEnabled') else 'Нет',
-                    'Дата генерации': generate_date,
-                    'Последний запрос': last_request_date,
-                    'Истекает': expiration_date,
-                    'ID лицензии': license.get('id', '')
-                })
-            
-            # Создаем DataFrame
-            if excel_data:
-                df = pd.DataFrame(excel_data)
-            else:
-                # Создаем пустой DataFrame с правильными колонками
-                df = pd.DataFrame(columns=[
-                    'ID организации', 'Название организации', 'Код лицензии', 
-                    'Продукт', 'Подписка', 'AP ID', 'Статус', 'Онлайн', 
-                    'Включена', 'Дата генерации', 'Последний запрос', 
-                    'Истекает', 'ID лицензии'
-                ])
-            
-            # Создаем Excel файл в памяти
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Лицензии iiko', index=False)
-                
-                # Форматируем колонки
-                worksheet = writer.sheets['Лицензии iiko']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            output.seek(0)
-            
-            # Генерируем имя файла
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"iiko_licenses_{timestamp}.xlsx"
-            
-            return output, filename
-            
-        except Exception as e:
-            print(f"Error in export_licenses_to_excel: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Ошибка при экспорте: {str(e)}")
-        finally:
-            db.close()
-            
+        """Потоковая выгрузка лицензий: (итератор байтов, имя файла, media type)"""
+        writer = IikoController.export_writer(fmt)
+        items = IikoController.iter_licenses_data(search, status, organization_id, is_online)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"iiko_licenses_{timestamp}.{fmt}"
+        return writer(items), filename, IikoController.EXPORT_MEDIA_TYPES[fmt]
+
     @classmethod
-    def create_license(cls, uid: str, title: str, count: int = 1,
-                       product_name: str = "iiko", product_sub_name: str = "GosuCashRegisterPlugin"):
+    async def create_license(cls, uid: str, title: str, count: int = 1,
+                       product_name: str = "iiko", product_sub_name: str = "GosuCashRegisterPlugin",
+                       audit: bool = True):
         try:
             payload = {
                 "uid": uid,
@@ -244,48 +265,145 @@ class IikoController:
                 "product_name": product_name,
                 "product_sub_name": product_sub_name
             }
-            headers = {
-                "Accept": "*/*",
-                "Content-Type": "application/json",
-                "ApiKey": cls.API_KEY
-            }
-            url = f"{cls.API_URL}/{uid}"
-            resp = requests.patch(url, json=payload, headers=headers)
-            resp.raise_for_status()
+            resp = await license_api.arequest("PATCH", f"/{uid}", json=payload, name="license.create")
             data = resp.json()
-            log_to_db("INFO", f"Created iiko license for {uid}")
+            if audit:
+                log_to_db("INFO", f"Created iiko license for {uid}")
             return data
         except Exception as e:
             logger.error(f"Ошибка создания лицензии: {e}")
-            log_to_db("ERROR", f"Failed to create iiko license: {e}")
+            if audit:
+                log_to_db("ERROR", f"Failed to create iiko license: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
     @classmethod
-    def verify_license(cls, license_code: str, ap_uid: str = "-", ap_online: bool = False,
-                       deviceid=None, device_name=None, datetime=None, request=None, responce=None, error=None):
+    async def verify_license(cls, license_code: str, ap_uid: str = "-", ap_online: bool = False,
+                       deviceid=None, device_name=None, datetime=None, request=None, responce=None, error=None,
+                       audit: bool = True):
+        payload = {
+            "license": license_code,
+            "ap_uid": ap_uid,
+            "ap_online": ap_online,
+            "deviceid": deviceid,
+            "device_name": device_name,
+            "datetime": datetime,
+            "request": request,
+            "responce": responce,
+            "error": error
+        }
+        # Запросы с телеметрией устройства всегда уходят в API, кэшируются только «голые» проверки
+        if any(v is not None for v in (deviceid, device_name, datetime, request, responce, error)):
+            return cls._unpack_verify_result(await cls._audited(cls._verify_upstream(payload), license_code, audit))
+
+        key = (license_code, ap_uid)
+        result = cls.verify_cache.get(key)
+        if result is MISSING:
+            # Одновременные промахи по одному ключу -> один вызов API; запись аудита — у каждого вызывающего,
+            # иначе флаг audit первого (например, пакетной проверки) решал бы за всех
+            flight = cls.verify_flight.do(key, lambda: cls._verify_and_cache(key, payload))
+            result = await cls._audited(flight, license_code, audit)
+        return cls._unpack_verify_result(result)
+
+    @classmethod
+    async def _verify_and_cache(cls, key, payload: dict):
+        result = await cls._verify_upstream(payload)
+        ttl = settings.VERIFY_CACHE_TTL if result[0] == "ok" else settings.VERIFY_CACHE_NEGATIVE_TTL
+        cls.verify_cache.set(key, result, ttl=ttl)
+        return result
+
+    @staticmethod
+    async def _audited(call, license_code: str, audit: bool):
+        """Дожидается проверки и пишет запись аудита для этого вызывающего"""
         try:
-            payload = {
-                "license": license_code,
-                "ap_uid": ap_uid,
-                "ap_online": ap_online,
-                "deviceid": deviceid,
-                "device_name": device_name,
-                "datetime": datetime,
-                "request": request,
-                "responce": responce,
-                "error": error
-            }
-            headers = {
-                "Accept": "*/*",
-                "Content-Type": "application/json",
-                "ApiKey": cls.API_KEY
-            }
-            resp = requests.post(cls.API_URL, json=payload, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            log_to_db("INFO", f"Verified iiko license {license_code[:12]}...")
-            return data
+            result = await call
+        except HTTPException as e:
+            if audit:
+                log_to_db("ERROR", f"Failed to verify license: {e.detail}")
+            raise
+        if audit:
+            if result[0] == "ok":
+                log_to_db("INFO", f"Verified iiko license {license_code[:12]}...")
+            else:
+                log_to_db("ERROR", f"Failed to verify license: {result[1]}")
+        return result
+
+    @classmethod
+    async def _verify_upstream(cls, payload: dict):
+        """("ok", data) или ("rejected", detail) для отказа API (4xx); прочие ошибки -> HTTPException"""
+        try:
+            # Повторная проверка безопасна — разрешаем ретраи, хотя это POST
+            resp = await license_api.arequest("POST", json=payload, name="license.verify", idempotent=True)
+            return ("ok", resp.json())
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Ошибка проверки лицензии: {e}")
+            if e.response.status_code < 500:
+                return ("rejected", str(e))
+            raise HTTPException(status_code=500, detail=str(e))
         except Exception as e:
             logger.error(f"Ошибка проверки лицензии: {e}")
-            log_to_db("ERROR", f"Failed to verify license: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def _unpack_verify_result(result):
+        status, value = result
+        if status != "ok":
+            raise HTTPException(status_code=500, detail=value)
+        return value
+
+    @classmethod
+    def verify_cache_stats(cls) -> dict:
+        return {**cls.verify_cache.stats(), "coalesced": cls.verify_flight.coalesced}
+
+    @staticmethod
+    async def run_batch(action: str, items: list, func):
+        """Выполняет func(item) для всех items с ограничением параллельности.
+
+        Отдаёт результаты по мере готовности; в конце пишет одну аудит-запись на весь пакет.
+        """
+        semaphore = asyncio.Semaphore(settings.LICENSE_BATCH_CONCURRENCY)
+
+        async def run(index: int, item: str):
+            async with semaphore:
+                try:
+                    return {"index": index, "item": item, "ok": True, "result": await func(item)}
+                except HTTPException as e:
+                    return {"index": index, "item": item, "ok": False, "error": e.detail}
+                except Exception as e:
+                    return {"index": index, "item": item, "ok": False, "error": str(e)}
+
+        tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+        failed = []
+        completed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                completed += 1
+                if not result["ok"]:
+                    failed.append({"item": result["item"], "error": result["error"]})
+                yield result
+        finally:
+            # Клиент мог оборвать потоковый ответ — незавершённые вызовы отменяем
+            for task in tasks:
+                task.cancel()
+            log_to_db(
+                "ERROR" if failed else "INFO",
+                f"Batch {action}: {completed - len(failed)}/{len(items)} succeeded",
+                metadata={"action": action, "total": len(items), "completed": completed, "failed": failed},
+            )
+
+    @classmethod
+    def create_licenses_batch(cls, uids: list, title: str, count: int = 1,
+                              product_name: str = "iiko", product_sub_name: str = "GosuCashRegisterPlugin"):
+        return cls.run_batch(
+            "create",
+            uids,
+            lambda uid: cls.create_license(uid, title, count, product_name, product_sub_name, audit=False),
+        )
+
+    @classmethod
+    def verify_licenses_batch(cls, license_codes: list, ap_uid: str = "-"):
+        return cls.run_batch(
+            "verify",
+            license_codes,
+            lambda code: cls.verify_license(code, ap_uid, audit=False),
+        )
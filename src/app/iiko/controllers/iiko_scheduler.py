@@ -1,36 +1,179 @@
-import requests
+import hashlib
+import json
+import time
+import ijson
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.database.database import SessionLocal
 from app.database.schemas import LicenseIiko
 from app.core.logger import logger, log_to_db
+from app.core.http_client import license_api
+from app.iiko.controllers.license_snapshot import license_snapshots
 
 class IikoScheduler:
-    API_URL = "https://api.lm.gosu.kz/license"
-    API_KEY = "liErLyguNEOLOwPOLINIteRFloGAgEackWaRSONiaHLocrECTa"
+    BATCH_SIZE = 500
 
     @classmethod
     def update_licenses(cls):
         db = SessionLocal()
         try:
-            headers = {
-                "Accept": "*/*",
-                "User-Agent": "IntegrationManager",
-                "ApiKey": cls.API_KEY
-            }
-            response = requests.get(cls.API_URL, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            db.query(LicenseIiko).delete()
-            for item in data:
-                db.add(LicenseIiko(data=item))
+            start = time.perf_counter()
+            # Тело ответа разбирается по мере получения, лицензии пишутся пачками по BATCH_SIZE
+            with license_api.stream("GET", name="license.list") as response:
+                stats = cls.sync_licenses(db, cls.iter_licenses(response.iter_bytes()))
             db.commit()
+            elapsed = time.perf_counter() - start
+            stats["records_per_sec"] = round(stats["received"] / elapsed, 1) if elapsed else 0.0
 
-            logger.info(f"iiko licenses synced ({len(data)} records)")
-            log_to_db("INFO", f"Synced {len(data)} iiko licenses")
+            if stats["inserted"] or stats["updated"] or stats["deleted"]:
+                license_snapshots.refresh(force=True)
+
+            summary = ", ".join(f"{k}={v}" for k, v in stats.items())
+            logger.info(f"iiko licenses synced in {elapsed:.2f}s ({summary})")
+            log_to_db("INFO", f"Synced {stats['received']} iiko licenses ({summary})", metadata=stats)
+            return stats
 
         except Exception as e:
             db.rollback()
             logger.error(f"Error syncing iiko licenses: {e}")
             log_to_db("ERROR", f"iiko sync failed: {e}")
+            raise
         finally:
             db.close()
+
+    @staticmethod
+    def iter_licenses(chunks):
+        """Инкрементальный разбор JSON-массива лицензий: в памяти только текущий кусок тела"""
+        parsed = ijson.sendable_list()
+        # use_float — числа как float, а не Decimal (иначе поменяются data и data_hash)
+        parser = ijson.items_coro(parsed, "item", use_float=True)
+        for chunk in chunks:
+            parser.send(chunk)
+            yield from parsed
+            del parsed[:]
+        parser.close()
+        yield from parsed
+
+    @staticmethod
+    def license_key(item: dict):
+        """Ключ лицензии — id внутри JSON (data['license']['id'])"""
+        key = (item.get("license") or {}).get("id")
+        return str(key) if key is not None else None
+
+    @staticmethod
+    def record_hash(item: dict) -> str:
+        payload = json.dumps(item, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    @classmethod
+    def license_columns(cls, item: dict) -> dict:
+        """Типизированные поля LicenseIiko, извлечённые из JSON лицензии"""
+        license = item.get('license') or {}
+        org = license.get('organization') or {}
+        is_online = license.get('isOnline')
+
+        organization_id = license.get('organizationId')
+        organization_name = org.get('name')
+        license_code = license.get('licenseCode')
+        search_parts = [str(v).lower() for v in (organization_name, license_code, organization_id) if v]
+
+        return {
+            "organization_id": str(organization_id) if organization_id is not None else None,
+            "organization_name": organization_name,
+            "license_code": license_code,
+            "is_active": license.get('isActive') is True,
+            "is_online": is_online if isinstance(is_online, bool) else None,
+            "last_request_date": cls.parse_date(license.get('lastRequestDate')),
+            "expiration_date": cls.parse_date(license.get('licenseExpirationDate')),
+            "search_text": "\n".join(search_parts) or None,
+        }
+
+    @classmethod
+    def sync_licenses(cls, db, items) -> dict:
+        """Сравнивает выгрузку с таблицей по хешам и пишет только изменения. Коммит — на вызывающем.
+
+        items может быть генератором: записи обрабатываются пачками по BATCH_SIZE.
+        """
+        stats = {"received": 0, "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skipped": 0}
+
+        existing = dict(
+            db.query(LicenseIiko.license_id, LicenseIiko.data_hash)
+            .filter(LicenseIiko.license_id.isnot(None))
+            .all()
+        )
+        seen = set()
+
+        batch = {}
+        for item in items:
+            stats["received"] += 1
+            key = cls.license_key(item)
+            if key is None:
+                stats["skipped"] += 1
+                continue
+            # Повтор ключа в пачке: побеждает последняя запись
+            batch[key] = item
+            if len(batch) >= cls.BATCH_SIZE:
+                cls._write_batch(db, batch, existing, seen, stats)
+                batch = {}
+        cls._write_batch(db, batch, existing, seen, stats)
+
+        vanished = [key for key in existing if key not in seen]
+        for i in range(0, len(vanished), cls.BATCH_SIZE):
+            stats["deleted"] += (
+                db.query(LicenseIiko)
+                .filter(LicenseIiko.license_id.in_(vanished[i:i + cls.BATCH_SIZE]))
+                .delete(synchronize_session=False)
+            )
+
+        # Строки, записанные до появления license_id, заменяются свежими
+        stats["deleted"] += (
+            db.query(LicenseIiko)
+            .filter(LicenseIiko.license_id.is_(None))
+            .delete(synchronize_session=False)
+        )
+        return stats
+
+    @classmethod
+    def _write_batch(cls, db, batch: dict, existing: dict, seen: set, stats: dict):
+        """Upsert изменившихся лицензий одной пачки"""
+        changed = []
+        for key, item in batch.items():
+            seen.add(key)
+            item_hash = cls.record_hash(item)
+            if key not in existing:
+                stats["inserted"] += 1
+            elif existing[key] != item_hash:
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+                continue
+            # Ключ может встретиться в следующей пачке ещё раз — сравнение пойдёт с записанным хешем
+            existing[key] = item_hash
+            changed.append({
+                "license_id": key,
+                "data": item,
+                "data_hash": item_hash,
+                **cls.license_columns(item),
+            })
+        if not changed:
+            return
+
+        stmt = pg_insert(LicenseIiko).values(changed)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LicenseIiko.license_id],
+            set_={
+                **{name: stmt.excluded[name] for name in changed[0] if name != "license_id"},
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
@@ -0,0 +1,221 @@
+import threading
+import time
+from sqlalchemy import func
+from app.database.database import SessionLocal
+from app.database.schemas import LicenseIiko
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.pagination import decode_cursor, encode_cursor
+
+# Ключи сортировки /iiko/licenses -> поле LicenseIiko (как IikoController.SORT_COLUMNS)
+SORT_FIELDS = {
+    "organization": "organization_name",
+    "status": "is_active",
+    "lastRequestDate": "last_request_date",
+    "expirationDate": "expiration_date",
+    "updated_at": "updated_at",
+}
+
+
+def _sort_orders(values: list, ids):
+    """Порядки (asc, desc) как в SQL: column ASC/DESC NULLS LAST, затем id в том же направлении.
+
+    Строки сравниваются по кодовым точкам — это порядок COLLATE "C", который использует order_keyset.
+    """
+    import numpy as np
+
+    nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    ranks = np.zeros(len(values), dtype=np.int64)
+    present = [v.timestamp() if hasattr(v, "timestamp") else v for v in values if v is not None]
+    if present:
+        _, inverse = np.unique(np.array(present, dtype=object), return_inverse=True)
+        ranks[~nulls] = inverse
+    # lexsort: главный ключ — последний
+    ascending = np.lexsort((ids, ranks, nulls))
+    descending = np.lexsort((-ids, -ranks, nulls))
+    return ascending, descending
+
+
+class LicenseSnapshot:
+    """Неизменяемый колоночный снимок таблицы licenses_iiko для фильтрации, сортировки и пагинации в памяти"""
+
+    def __init__(self, version: int, source: tuple, rows: list):
+        # numpy грузится при первой сборке снимка (в фоне), а не при импорте маршрутов
+        import numpy as np
+
+        self.version = version
+        self.source = source
+        self.size = len(rows)
+
+        self.ids = np.array([r.id for r in rows], dtype=np.int64)
+        self.items = [r.data for r in rows]
+        self.is_active = np.array([bool(r.is_active) for r in rows], dtype=bool)
+        # 1 / 0 / -1 (NULL) — NULL не совпадает ни с true, ни с false, как в SQL
+        self.is_online = np.array(
+            [-1 if r.is_online is None else int(r.is_online) for r in rows], dtype=np.int8
+        )
+        self.organization_id = np.array([r.organization_id for r in rows], dtype=object)
+        self.search_text = np.array([r.search_text or "" for r in rows], dtype=str)
+        self.position_by_id = {row_id: i for i, row_id in enumerate(self.ids.tolist())}
+
+        self.sort_values = {}
+        self.orders = {}
+        for key, field in SORT_FIELDS.items():
+            values = [getattr(r, field) for r in rows]
+            self.sort_values[key] = values
+            self.orders[(key, False)], self.orders[(key, True)] = _sort_orders(values, self.ids)
+
+    def query(
+        self,
+        page: int = 1,
+        limit: int = 10,
+        search: str = None,
+        status: str = None,
+        organization_id: str = None,
+        is_online: bool = None,
+        sort_by: str = "updated_at",
+        sort_order: str = "desc",
+        after: str = None,
+        count: str = "exact",
+    ):
+        """Тот же ответ, что и IikoController.get_licenses; None — курсор не из этого снимка, нужен запрос в БД"""
+        import numpy as np
+
+        mask = np.ones(self.size, dtype=bool)
+        if search:
+            mask &= np.char.find(self.search_text, search.lower()) >= 0
+        if status == "active":
+            mask &= self.is_active
+        elif status == "expired":
+            mask &= ~self.is_active
+        if organization_id:
+            mask &= self.organization_id == organization_id
+        if is_online is not None:
+            mask &= self.is_online == int(is_online)
+
+        sort_key = sort_by if sort_by in SORT_FIELDS else "updated_at"
+        order = self.orders[(sort_key, sort_order != "asc")]
+        matched = order[mask[order]]
+
+        if after:
+            _, row_id = decode_cursor(after, getattr(LicenseIiko, SORT_FIELDS[sort_key]))
+            position = self.position_by_id.get(row_id)
+            if position is None:
+                return None
+            found = np.flatnonzero(matched == position)
+            if not len(found):
+                return None
+            start = int(found[0]) + 1
+        else:
+            start = (page - 1) * limit
+
+        selected = matched[start:start + limit]
+        next_cursor = None
+        if start + limit < len(matched) and len(selected):
+            last = int(selected[-1])
+            next_cursor = encode_cursor(self.sort_values[sort_key][last], int(self.ids[last]))
+
+        return {
+            "page": page,
+            "limit": limit,
+            "total": None if count == "none" else len(matched),
+            "items": [self.items[i] for i in selected.tolist()],
+            "next_cursor": next_cursor,
+        }
+
+
+class LicenseSnapshotStore:
+    """Держит текущий снимок и атомарно подменяет его после синхронизации или изменения таблицы.
+
+    Отпечаток таблицы сверяет фоновый поток воркера раз в check_interval; запросы только
+    читают текущую ссылку и никогда не ждут пересборки.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self):
+        return self._snapshot
+
+    @staticmethod
+    def _source(db) -> tuple:
+        """Отпечаток таблицы: меняется при вставке, обновлении (updated_at) и удалении строк"""
+        total, last_update = db.query(func.count(LicenseIiko.id), func.max(LicenseIiko.updated_at)).one()
+        return total, last_update.isoformat() if last_update else None
+
+    def fingerprint(self) -> tuple:
+        """Текущий отпечаток таблицы без пересборки снимка"""
+        db = SessionLocal()
+        try:
+            return self._source(db)
+        finally:
+            db.close()
+
+    def refresh(self, force: bool = False):
+        """Пересобирает снимок, если таблица изменилась (или force). Синхронный — для потоков и планировщика."""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                source = self._source(db)
+                if not force and self._snapshot is not None and self._snapshot.source == source:
+                    return self._snapshot
+
+                start = time.perf_counter()
+                rows = (
+                    db.query(
+                        LicenseIiko.id,
+                        LicenseIiko.data,
+                        LicenseIiko.updated_at,
+                        LicenseIiko.organization_id,
+                        LicenseIiko.organization_name,
+                        LicenseIiko.is_active,
+                        LicenseIiko.is_online,
+                        LicenseIiko.last_request_date,
+                        LicenseIiko.expiration_date,
+                        LicenseIiko.search_text,
+                    )
+                    .all()
+                )
+                self._version += 1
+                snapshot = LicenseSnapshot(self._version, source, rows)
+                # Подмена ссылки атомарна: читатели видят либо старый, либо новый снимок целиком
+                self._snapshot = snapshot
+                logger.info(
+                    f"License snapshot v{snapshot.version} built: {snapshot.size} rows "
+                    f"[{time.perf_counter() - start:.2f}s]"
+                )
+                return snapshot
+            except Exception as e:
+                logger.error(f"Error building license snapshot: {e}")
+                return self._snapshot
+            finally:
+                db.close()
+
+    def start(self):
+        """Фоновый поток: первая сборка снимка и затем сверка отпечатка раз в check_interval"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="license-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.check_interval)
+
+    async def get(self):
+        """Текущий снимок без ожидания; None — снимок ещё не собран, ответ даст БД"""
+        return self._snapshot
+
+
+license_snapshots = LicenseSnapshotStore(check_interval=settings.LICENSE_SNAPSHOT_CHECK_INTERVAL)
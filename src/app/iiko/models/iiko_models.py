@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from app.core.config import settings
+
+class LicenseBatchCreate(BaseModel):
+    uids: list[str] = Field(..., min_length=1, max_length=settings.LICENSE_BATCH_MAX_ITEMS)
+    title: str
+    count: int = 1
+    product_name: str = "iiko"
+    product_sub_name: str = "GosuCashRegisterPlugin"
+
+class LicenseBatchVerify(BaseModel):
+    license_codes: list[str] = Field(..., min_length=1, max_length=settings.LICENSE_BATCH_MAX_ITEMS)
+    ap_uid: str = "-"
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from app.iiko.controllers.iiko_controller import IikoController
 from app.iiko.controllers.iiko_scheduler import IikoScheduler
+from app.iiko.controllers.export_jobs import ExportJobs
 from app.auth.auth import require_role, get_current_user
 from app.auth.models.auth_models import UserRole
-from fastapi.responses import StreamingResponse
+from app.iiko.models.iiko_models import LicenseBatchCreate, LicenseBatchVerify
+from fastapi.responses import StreamingResponse, Response, FileResponse
+from app.core.http_client import license_api
+from app.core.jobs import JobRunner
+from app.core.scheduler import LICENSE_SYNC_JOB
+from app.core.http_cache import make_etag, is_not_modified
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse, dumps
+from app.iiko.controllers.license_snapshot import license_snapshots
 
 router = APIRouter(
     prefix="/iiko",
@@ -12,17 +21,20 @@ router = APIRouter(
 )
 
 @router.get("/licenses")
-def get_licenses(
+async def get_licenses(
+    request: Request,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, le=100),
+    limit: int = Query(10, ge=1, le=100),
     search: str = Query(None),
     status: str = Query("all"),
     organization_id: str = Query(None),
     is_online: bool = Query(None),
     sort_by: str = Query("updated_at"),
-    sort_order: str = Query("desc")
+    sort_order: str = Query("desc"),
+    after: str = Query(None, description="Курсор next_cursor из предыдущего ответа"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$")
 ):
-    return IikoController.get_licenses(
+    params = dict(
         page=page,
         limit=limit,
         search=search,
@@ -30,18 +42,36 @@ def get_licenses(
         organization_id=organization_id,
         is_online=is_online,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        after=after,
+        count=count
     )
+    snapshot = await license_snapshots.get() if settings.LICENSE_SNAPSHOT_ENABLED else None
+    if snapshot is None:
+        return FastJSONResponse(await IikoController.get_licenses(**params))
+
+    # Версия данных — отпечаток таблицы из снимка, одинаковый во всех воркерах.
+    # Last-Modified не отдаём: max(updated_at) не меняется при удалении строк и пишется
+    # в локальном времени сервера БД, поэтому If-Modified-Since давал бы устаревшие 304.
+    etag = make_etag(snapshot.source, params)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_not_modified(request.headers, etag):
+        return Response(status_code=304, headers=headers)
+
+    result = await IikoController.get_licenses(**params, snapshot=snapshot)
+    return FastJSONResponse(result, headers=headers)
 
 @router.get("/licenses/export")
 def export_licenses(
     search: str = Query(None),
     status: str = Query("all"),
     organization_id: str = Query(None),
-    is_online: bool = Query(None)
+    is_online: bool = Query(None),
+    format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$")
 ):
     try:
-        excel_file, filename = IikoController.export_licenses_to_excel(
+        content, filename, media_type = IikoController.export_licenses(
+            fmt=format,
             search=search,
             status=status,
             organization_id=organization_id,
@@ -49,8 +79,8 @@ def export_licenses(
         )
         
         return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            content,
+            media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     except HTTPException:
@@ -58,15 +88,85 @@ def export_licenses(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/licenses/export/jobs", status_code=202)
+def create_export_job(
+    search: str = Query(None),
+    status: str = Query("all"),
+    organization_id: str = Query(None),
+    is_online: bool = Query(None),
+    format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$")
+):
+    """Фоновая выгрузка: возвращает задачу (новую или готовую для тех же фильтров и данных)"""
+    return ExportJobs.submit(
+        format,
+        search=search,
+        status=status,
+        organization_id=organization_id,
+        is_online=is_online
+    )
+
+@router.get("/licenses/export/jobs/{job_id}")
+def get_export_job(job_id: str):
+    return ExportJobs.get(job_id)
+
+@router.get("/licenses/export/jobs/{job_id}/download")
+def download_export_job(job_id: str):
+    path, filename, media_type = ExportJobs.artifact(job_id)
+    return FileResponse(path, media_type=media_type, filename=filename)
+
 @router.post("/update")
 def update_iiko():
-    IikoScheduler.update_licenses()
-    return {"status": "ok", "message": "iiko licenses updated"}
+    # Та же блокировка, что и у плановой синхронизации: параллельно не запускаем
+    run = JobRunner.run(LICENSE_SYNC_JOB, IikoScheduler.update_licenses)
+    if run["status"] == "busy":
+        raise HTTPException(status_code=409, detail="iiko license sync is already running")
+    if run["status"] == "failed":
+        raise HTTPException(status_code=500, detail=run["error"])
+    return {"status": "ok", "message": "iiko licenses updated", "stats": run["result"]}
+
+@router.get("/update/status")
+def update_iiko_status():
+    """Последний запуск синхронизации лицензий (любым воркером)"""
+    return JobRunner.status(LICENSE_SYNC_JOB)
 
 @router.post("/license/create")
-def create_license(uid: str, title: str):
-    return IikoController.create_license(uid, title)
+async def create_license(uid: str, title: str):
+    return await IikoController.create_license(uid, title)
 
 @router.post("/license/verify")
-def verify_license(license_code: str):
-    return IikoController.verify_license(license_code)
+async def verify_license(license_code: str):
+    return await IikoController.verify_license(license_code)
+
+async def _batch_response(results, stream: bool):
+    """NDJSON-поток результатов по мере готовности или один JSON в порядке входного списка"""
+    if stream:
+        async def lines():
+            async for result in results:
+                yield dumps(result) + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    items = sorted([result async for result in results], key=lambda r: r["index"])
+    succeeded = sum(1 for r in items if r["ok"])
+    return {"total": len(items), "succeeded": succeeded, "failed": len(items) - succeeded, "items": items}
+
+@router.post("/license/create/batch")
+async def create_licenses_batch(body: LicenseBatchCreate, stream: bool = Query(False)):
+    results = IikoController.create_licenses_batch(
+        body.uids, body.title, body.count, body.product_name, body.product_sub_name
+    )
+    return await _batch_response(results, stream)
+
+@router.post("/license/verify/batch")
+async def verify_licenses_batch(body: LicenseBatchVerify, stream: bool = Query(False)):
+    results = IikoController.verify_licenses_batch(body.license_codes, body.ap_uid)
+    return await _batch_response(results, stream)
+
+@router.get("/license/verify/stats")
+def verify_cache_stats():
+    """Попадания/промахи кэша проверки лицензий в этом воркере"""
+    return IikoController.verify_cache_stats()
+
+@router.get("/upstream/stats")
+def upstream_stats():
+    """Латентность вызовов API лицензий в этом воркере"""
+    return license_api.stats()
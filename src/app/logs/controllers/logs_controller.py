@@ -1,45 +1,68 @@
-from app.database.database import SessionLocal
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.database.database import AsyncSessionLocal
 from app.database.schemas import LogEntry
 from app.core.logger import logger
+from app.core.pagination import count_total, order_keyset, seek_after, fetch_page
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at хранится без таймзоны (UTC), а asyncpg не принимает aware-значения для такой колонки
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 class LogsController:
     @staticmethod
-    def get_logs(page: int = 1, limit: int = 20, level: str | None = None, search: str | None = None):
-        """Получает логи из БД с фильтрацией и пагинацией"""
-        db = SessionLocal()
-        try:
-            query = db.query(LogEntry).order_by(LogEntry.created_at.desc())
-            
-            if level:
-                query = query.filter(LogEntry.level.ilike(level))
-            if search:
-                pattern = f"%{search}%"
-                query = query.filter(LogEntry.message.ilike(pattern))
-            
-            total = query.count()
-            logs = (
-                query.offset((page - 1) * limit)
-                .limit(limit)
-                .all()
-            )
-            
-            items = [
-                {
-                    "id": log.id,
-                    "level": log.level,
-                    "message": log.message,
-                    "path": log.path,
-                    "method": log.method,
-                    "ip_addres": log.ip_address,
-                    "created_at": log.created_at.isoformat(),
-                    "metadata": log.data
-                }
-                for log in logs
-            ]
-            
-            return {"page": page, "limit": limit, "total": total, "items": items}
-        except Exception as e:
-            logger.error(f"Ошибка при получении логов: {e}")
-            return {"error": str(e)}
-        finally:
-            db.close()
+    async def get_logs(
+        page: int = 1,
+        limit: int = 20,
+        level: str | None = None,
+        search: str | None = None,
+        after: str | None = None,
+        count: str = "exact",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+    ):
+        """Получает логи из БД с фильтрацией и пагинацией (page/limit или курсор after)"""
+        async with AsyncSessionLocal() as db:
+            try:
+                stmt = select(LogEntry)
+                
+                if level:
+                    stmt = stmt.filter(LogEntry.level.ilike(level))
+                if search:
+                    pattern = f"%{search}%"
+                    stmt = stmt.filter(LogEntry.message.ilike(pattern))
+                # Границы по created_at отсекают секции logs ещё на этапе планирования
+                if date_from:
+                    stmt = stmt.filter(LogEntry.created_at >= _naive_utc(date_from))
+                if date_to:
+                    stmt = stmt.filter(LogEntry.created_at < _naive_utc(date_to))
+                
+                total = await count_total(db, stmt, count)
+                stmt = order_keyset(stmt, LogEntry.created_at, LogEntry.id)
+                if after:
+                    stmt = seek_after(stmt, LogEntry.created_at, LogEntry.id, after)
+                logs, next_cursor = await fetch_page(db, stmt, LogEntry.created_at, limit, page, after)
+                
+                items = [
+                    {
+                        "id": log.id,
+                        "level": log.level,
+                        "message": log.message,
+                        "path": log.path,
+                        "method": log.method,
+                        "ip_addres": log.ip_address,
+                        "created_at": log.created_at.isoformat(),
+                        "metadata": log.data
+                    }
+                    for log in logs
+                ]
+                
+                return {"page": page, "limit": limit, "total": total, "items": items, "next_cursor": next_cursor}
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при получении логов: {e}")
+                return {"error": str(e)}
@@ -0,0 +1,114 @@
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.database.database import engine
+from app.core.config import settings
+from app.core.logger import logger
+
+class LogsScheduler:
+    """Обслуживание дневных секций таблицы logs: создание заранее и удаление по сроку хранения"""
+
+    PARTITION_PREFIX = "logs_p"
+    DEFAULT_PARTITION = "logs_default"
+
+    @classmethod
+    def partition_name(cls, day) -> str:
+        return f"{cls.PARTITION_PREFIX}{day:%Y%m%d}"
+
+    @classmethod
+    def ensure_partitions(cls, conn=None, days_back: int = 0):
+        """Создаёт секции с (сегодня - days_back) по (сегодня + LOG_PARTITIONS_AHEAD) и секцию DEFAULT"""
+        if conn is None:
+            with engine.begin() as conn:
+                return cls.ensure_partitions(conn, days_back)
+
+        # Та же блокировка, что у run_migrations: секции создаёт один процесс за раз
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+        # Страховка на случай, если задача не запускалась: строки вне диапазонов попадут сюда
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {cls.DEFAULT_PARTITION} PARTITION OF logs DEFAULT"))
+
+        today = datetime.utcnow().date()
+        created = 0
+        for offset in range(-days_back, settings.LOG_PARTITIONS_AHEAD + 1):
+            day = today + timedelta(days=offset)
+            name = cls.partition_name(day)
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+                continue
+            bounds = {"start": day, "end": day + timedelta(days=1)}
+            in_default = conn.execute(text(
+                f"SELECT EXISTS (SELECT 1 FROM {cls.DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end)"
+            ), bounds).scalar()
+            if in_default:
+                cls._create_from_default(conn, name, bounds)
+            else:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF logs "
+                    f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+                ))
+            created += 1
+        return created
+
+    @classmethod
+    def _create_from_default(cls, conn, name: str, bounds: dict):
+        """Секция за день, строки которого уже лежат в DEFAULT (обслуживание не запускалось вовремя).
+
+        Postgres не даст создать такую секцию, пока DEFAULT содержит её строки, поэтому
+        DEFAULT временно отсоединяется, а строки переносятся в новую секцию.
+        """
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text(f"ALTER TABLE logs DETACH PARTITION {cls.DEFAULT_PARTITION}"))
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF logs "
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        ))
+        moved = conn.execute(text(
+            "INSERT INTO logs (id, level, message, path, method, ip_address, data, created_at) "
+            "SELECT id, level, message, path, method, ip_address, data, created_at "
+            f"FROM {cls.DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end"
+        ), bounds).rowcount
+        conn.execute(text(
+            f"DELETE FROM {cls.DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end"
+        ), bounds)
+        conn.execute(text(f"ALTER TABLE logs ATTACH PARTITION {cls.DEFAULT_PARTITION} DEFAULT"))
+        logger.info(f"Log partition {name} created, {moved} rows moved from {cls.DEFAULT_PARTITION}")
+
+    @classmethod
+    def drop_expired_partitions(cls):
+        """Отсоединяет и удаляет целые секции старше LOG_RETENTION_DAYS вместо построчного DELETE"""
+        cutoff = datetime.utcnow().date() - timedelta(days=settings.LOG_RETENTION_DAYS)
+        pattern = re.compile(rf"^{cls.PARTITION_PREFIX}(\d{{8}})$")
+        dropped = []
+        with engine.begin() as conn:
+            partitions = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'logs'::regclass"
+            )).scalars().all()
+            for name in partitions:
+                match = pattern.match(name)
+                if not match or datetime.strptime(match.group(1), "%Y%m%d").date() >= cutoff:
+                    continue
+                conn.execute(text(f"ALTER TABLE logs DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+            # В DEFAULT обычно пусто, поэтому здесь обычный DELETE дёшев
+            cleared = conn.execute(
+                text(f"DELETE FROM {cls.DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+                {"cutoff": cutoff},
+            ).rowcount
+        return dropped, cleared
+
+    @classmethod
+    def maintain_partitions(cls):
+        try:
+            created = cls.ensure_partitions()
+            dropped, cleared = cls.drop_expired_partitions()
+            logger.info(
+                f"Log partitions maintained: created {created}, dropped {len(dropped)} "
+                f"({', '.join(dropped) or '-'}), cleared {cleared} rows from default"
+            )
+        except Exception as e:
+            logger.error(f"Error maintaining log partitions: {e}")
+            raise
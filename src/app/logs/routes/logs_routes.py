@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Query, Depends
+from datetime import datetime
+from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi.responses import FileResponse
 from app.logs.controllers.logs_controller import LogsController
 from app.auth.auth import require_role
 from app.auth.models.auth_models import UserRole
+from app.core.serialization import FastJSONResponse
+from app.core.profiling import RequestProfile
+from app.core.log_policy import log_policy
+from app.core.log_sink import log_sink
 
 router = APIRouter(
     prefix="/logs",
@@ -10,11 +16,35 @@ router = APIRouter(
 )
 
 @router.get("/")
-def get_logs(
+async def get_logs(
     page: int = Query(1, ge=1),
-    limit: int = Query(20, le=200),
+    limit: int = Query(20, ge=1, le=200),
     level: str | None = Query(None),
-    search: str | None = Query(None)
+    search: str | None = Query(None),
+    after: str | None = Query(None, description="Курсор next_cursor из предыдущего ответа"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None)
 ):
     """Получить логи системы (только для админов)"""
-    return LogsController.get_logs(page, limit, level, search)
+    return FastJSONResponse(
+        await LogsController.get_logs(page, limit, level, search, after, count, date_from, date_to)
+    )
+
+@router.get("/stats")
+def logging_stats():
+    """Сколько запросов этого воркера записано, отсеяно политикой и потеряно очередью"""
+    return {"policy": log_policy.stats(), "sink": log_sink.stats()}
+
+@router.get("/profiles")
+def list_profiles():
+    """Сохранённые профили запросов (X-Profile: 1), новые первыми"""
+    return RequestProfile.list()
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    path = RequestProfile.file_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    media_type = "text/html" if path.endswith(".html") else "text/plain"
+    return FileResponse(path, media_type=media_type)
@@ -1,9 +1,10 @@
-from app.database.database import SessionLocal, engine, Base
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database.database import SessionLocal
 from app.database.schemas import User, UserRole
 from app.auth.auth import get_password_hash
 
 def run_seed():
-    Base.metadata.create_all(bind=engine)
+    """Создаёт пользователей по умолчанию. Повторный запуск — один SELECT, без хеширования."""
     db = SessionLocal()
 
     users = [
@@ -12,9 +13,24 @@ def run_seed():
         ("partner@example.com", "partner123", UserRole.partner),
     ]
 
-    for email, password, role in users:
-        if not db.query(User).filter(User.email == email).first():
-            u = User(email=email, hashed_password=get_password_hash(password), role=role)
-            db.add(u)
-            print(f"✅ Created {role} user: {email}")
-    db.commit()
+    try:
+        # Один запрос на всех; хешируем пароли только тех, кого ещё нет
+        emails = [email for email, _, _ in users]
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(emails))}
+
+        roles = {email: role for email, _, role in users}
+        missing = [
+            {"email": email, "hashed_password": get_password_hash(password), "role": role}
+            for email, password, role in users
+            if email not in existing
+        ]
+        if missing:
+            # ON CONFLICT — если сиды одновременно запустили несколько процессов
+            created = db.execute(
+                pg_insert(User).values(missing).on_conflict_do_nothing(index_elements=[User.email]).returning(User.email)
+            ).scalars().all()
+            for email in created:
+                print(f"✅ Created {roles[email]} user: {email}")
+        db.commit()
+    finally:
+        db.close()
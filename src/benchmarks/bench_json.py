@@ -0,0 +1,60 @@
+"""Сериализация страницы /iiko/licenses (100 лицензий) и метаданных лога.
+
+before: dict из маршрута -> jsonable_encoder -> JSONResponse (stdlib json).
+after:  FastJSONResponse напрямую из маршрута (orjson, без jsonable_encoder).
+
+    cd src && python -m benchmarks.bench_json --items 100 --rounds 2000
+"""
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core.serialization import FastJSONResponse, dumps_str
+from benchmarks.synthetic import sample_license
+
+
+def measure(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = {
+        "page": 1,
+        "limit": args.items,
+        "total": 25000,
+        "items": [sample_license(i) for i in range(args.items)],
+        "next_cursor": "WyIyMDI1LTAxLTAxVDAwOjAwOjAwIiwxMDBd",
+    }
+    metadata = {
+        "ip_address": "10.0.0.15",
+        "user_agent": "Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0",
+        "processing_time": 0.012,
+        "status_code": 200,
+        "query_params": "page=1&limit=100",
+        "headers": {"accept": "application/json", "accept-encoding": "gzip, br", "host": "lm.local"},
+    }
+
+    before = measure(lambda: JSONResponse(jsonable_encoder(page)), args.rounds)
+    after = measure(lambda: FastJSONResponse(page), args.rounds)
+    size = len(FastJSONResponse(page).body)
+    log_before = measure(lambda: json.dumps(metadata), args.rounds * 10)
+    log_after = measure(lambda: dumps_str(metadata), args.rounds * 10)
+
+    print(f"page: {args.items} items, {size / 1024:.1f} KiB")
+    print(f"before, jsonable_encoder + json:  {before * 1e6:9.1f} us/response")
+    print(f"after, orjson response:           {after * 1e6:9.1f} us/response   x{before / after:.1f}")
+    print(f"log metadata, json.dumps:         {log_before * 1e6:9.2f} us")
+    print(f"log metadata, orjson:             {log_after * 1e6:9.2f} us   x{log_before / log_after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Пропускная способность проверки паролей при одновременных логинах.
+
+before: pwd_context.verify прямо в обработчике — как sync-маршрут в threadpool (40 потоков, как у anyio).
+after:  averify_password — async-маршрут, хеширование в пуле процессов PASSWORD_HASH_WORKERS.
+
+    cd src && python -m benchmarks.bench_login --logins 200 --concurrency 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.auth.auth import pwd_context, verify_password, averify_password, shutdown_hash_pool
+
+
+def report(name: str, latencies: list, elapsed: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:7s} {len(latencies) / elapsed:8.1f} logins/s   "
+        f"p50 {statistics.median(latencies) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms"
+    )
+
+
+def run_before(hashed: str, logins: int, concurrency: int):
+    def login():
+        start = time.perf_counter()
+        verify_password("admin123", hashed)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: login(), range(logins)))
+    report("before", latencies, time.perf_counter() - start)
+
+
+async def run_after(hashed: str, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            await averify_password("admin123", hashed)
+            return time.perf_counter() - start
+
+    await averify_password("admin123", hashed)  # прогрев пула процессов
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(login() for _ in range(logins)))
+    report("after", latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=40)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("admin123")
+    run_before(hashed, args.logins, args.concurrency)
+    try:
+        asyncio.run(run_after(hashed, args.logins, args.concurrency))
+    finally:
+        shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Время старта воркера: импорт main.py по пакетам и (с --with-db) startup-хуки.
+
+Каждый замер — в новом процессе, как при запуске/перезапуске воркера uvicorn.
+
+    cd src && python -m benchmarks.bench_startup --runs 5
+    cd src && python -m benchmarks.bench_startup --with-db --json startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import main
+result = {"import_s": time.perf_counter() - start}
+if "--with-db" in sys.argv:
+    import asyncio
+    start = time.perf_counter()
+    asyncio.run(main.app.router.startup())
+    result["startup_s"] = time.perf_counter() - start
+    asyncio.run(main.app.router.shutdown())
+print(json.dumps(result))
+"""
+
+
+def run_child(with_db: bool, importtime: bool):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD] + (["--with-db"] if with_db else [])
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(command, cwd=src_dir, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, proc.stderr
+
+
+def import_breakdown(stderr: str, top: int):
+    """Собственное время импорта по пакетам верхнего уровня и самые дорогие модули (cumulative)"""
+    by_package = defaultdict(int)
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        by_package[name.split(".")[0]] += self_us
+        # Глубина 1 — сам main, глубина 2 — то, что он импортирует напрямую
+        if (len(indent) - 1) // 2 <= 2:
+            modules.append((name, cumulative_us))
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    modules = sorted(modules, key=lambda item: item[1], reverse=True)[:top]
+    return (
+        [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in packages],
+        [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in modules],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--with-db", action="store_true", help="выполнить и startup-хуки (нужна БД)")
+    parser.add_argument("--json", help="файл для результатов в JSON")
+    args = parser.parse_args()
+
+    runs = [run_child(args.with_db, importtime=False)[0] for _ in range(args.runs)]
+    _, stderr = run_child(False, importtime=True)
+    packages, modules = import_breakdown(stderr, args.top)
+
+    report = {
+        "runs": args.runs,
+        "import_main_ms": round(statistics.median(r["import_s"] for r in runs) * 1000, 1),
+        "packages": packages,
+        "modules": modules,
+    }
+    if args.with_db:
+        report["startup_hooks_ms"] = round(statistics.median(r["startup_s"] for r in runs) * 1000, 1)
+
+    print(f"import main (median of {args.runs}): {report['import_main_ms']:8.1f} ms")
+    if args.with_db:
+        print(f"startup hooks (median):          {report['startup_hooks_ms']:8.1f} ms")
+    print("\nself import time by package:")
+    for row in packages:
+        print(f"  {row['package']:30s} {row['self_ms']:8.1f} ms")
+    print("\nslowest top-level imports (cumulative):")
+    for row in modules:
+        print(f"  {row['module']:50s} {row['cumulative_ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Накладные расходы LoggedFastAPI на User-Agent в расчёте на один запрос.
+
+Сравнивает прежний путь (user_agents.parse + форматирование строк прямо в обработке запроса)
+с текущим (запрос только забирает заголовок, разбор — в фоновом log_sink через LRU-кэш).
+
+    cd src && python -m benchmarks.bench_user_agent --requests 20000
+"""
+import argparse
+import random
+import time
+from user_agents import parse
+from app.core.user_agent import describe_user_agent
+
+SAMPLE_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.1 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; SM-A536B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Mobile Safari/537.36",
+    "GosuCashRegisterPlugin/2.4.1 (iikoFront 8.9; Windows 10)",
+    "IntegrationManager",
+    "python-httpx/0.28.1",
+    "curl/8.5.0",
+]
+
+
+def inline_parse(user_agent: str):
+    parsed = parse(user_agent)
+    browser = f"{parsed.browser.family} {parsed.browser.version_string}"
+    operating_system = f"{parsed.os.family} {parsed.os.version_string}"
+    return browser, operating_system, parsed.device.family
+
+
+def measure(func, user_agents) -> float:
+    start = time.perf_counter()
+    for user_agent in user_agents:
+        func(user_agent)
+    return (time.perf_counter() - start) / len(user_agents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    user_agents = [random.choice(SAMPLE_USER_AGENTS) for _ in range(args.requests)]
+
+    before = measure(inline_parse, user_agents)
+    describe_user_agent.cache_clear()
+    background = measure(describe_user_agent, user_agents)
+    after = measure(lambda ua: {"user_agent": ua}, user_agents)
+
+    print(f"requests:                          {args.requests}")
+    print(f"before, inline parse per request:  {before * 1e6:9.1f} us")
+    print(f"after, request path (raw header):  {after * 1e6:9.1f} us")
+    print(f"after, background parse with LRU:  {background * 1e6:9.1f} us")
+    print(f"saved on request path:             {(before - after) * 1e6:9.1f} us/request")
+    print(f"LRU: {describe_user_agent.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
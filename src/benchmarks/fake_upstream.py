@@ -0,0 +1,148 @@
+"""Локальная замена API лицензий с настраиваемой задержкой.
+
+    GET   /        — массив лицензий (chunked, генерируется на лету)
+    POST  /        — проверка лицензии (license с префиксом BAD -> 404)
+    PATCH /{uid}   — создание лицензии
+
+    cd src && python -m benchmarks.fake_upstream --port 8900 --licenses 100000 --latency 50
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.synthetic import generate_licenses
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Server(ThreadingHTTPServer):
+    # Очередь listen() по умолчанию — 5: при --concurrency 50 SYN отбрасываются и повторяются
+    # через ~1 с, и замер показывал бы задержки этого сервера, а не приложения
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class FakeLicenseApi:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, licenses: int = 10000,
+                 latency: float = 0.0, jitter: float = 0.0, seed: int = 42):
+        self.licenses = licenses
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        seconds = self.latency + random.uniform(0, self.jitter)
+        if seconds:
+            time.sleep(seconds)
+
+    def iter_body(self):
+        """JSON-массив кусками по CHUNK_SIZE — без сборки всей выгрузки в памяти"""
+        buffer = [b"["]
+        size = 1
+        for i, item in enumerate(generate_licenses(self.licenses, self.seed)):
+            part = (b"," if i else b"") + json.dumps(item, ensure_ascii=False).encode("utf-8")
+            buffer.append(part)
+            size += len(part)
+            if size >= CHUNK_SIZE:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        buffer.append(b"]")
+        yield b"".join(buffer)
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _send_json(self, status: int, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                api.delay()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in api.iter_body():
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_POST(self):
+                payload = self._read_json()
+                api.delay()
+                # Тело запроса — как у IikoController.verify_license: license / ap_uid
+                code = str(payload.get("license") or "")
+                if code.startswith("BAD"):
+                    return self._send_json(404, {"message": "License not found"})
+                self._send_json(200, {"licenseCode": code, "isValid": True, "apUId": payload.get("ap_uid")})
+
+            def do_PATCH(self):
+                payload = self._read_json()
+                api.delay()
+                uid = self.path.strip("/")
+                self._send_json(200, {"uid": uid, "title": payload.get("title"), "count": payload.get("count", 1)})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--licenses", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, мс")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, мс")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    api = FakeLicenseApi(args.host, args.port, args.licenses, args.latency / 1000, args.jitter / 1000, args.seed)
+    print(f"fake license API on {api.url} ({args.licenses} licenses, latency {args.latency} ms)")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
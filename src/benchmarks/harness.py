@@ -0,0 +1,63 @@
+"""Замеры для benchmarks.suite: перцентили, пропускная способность, пиковый RSS."""
+import asyncio
+import resource
+import sys
+import time
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса: ru_maxrss в КиБ на Linux и в байтах на macOS"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(name: str, latencies: list, elapsed: float, units: int = None, unit: str = "ops", **extra) -> dict:
+    """Результат сценария. units — сколько единиц работы сделано (по умолчанию — число замеров)"""
+    latencies = sorted(latencies)
+    units = len(latencies) if units is None else units
+    return {
+        "scenario": name,
+        "operations": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "throughput": round(units / elapsed, 2) if elapsed else 0.0,
+        "throughput_unit": f"{unit}/s",
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **extra,
+    }
+
+
+def timed_calls(func, args_list) -> tuple:
+    """Последовательно вызывает func(*args) для каждого набора; (латентности, общее время)"""
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        call_start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - call_start)
+    return latencies, time.perf_counter() - start
+
+
+async def timed_concurrent(coro_factory, args_list, concurrency: int) -> tuple:
+    """Асинхронные вызовы с ограничением параллельности; (латентности, общее время)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(args):
+        async with semaphore:
+            call_start = time.perf_counter()
+            await coro_factory(*args)
+            latencies.append(time.perf_counter() - call_start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(args) for args in args_list))
+    return latencies, time.perf_counter() - start
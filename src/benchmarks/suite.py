@@ -0,0 +1,336 @@
+"""Набор сценариев нагрузки на синтетических данных и локальной замене API лицензий.
+
+Сценарии без БД: list_paging, search, export, sync_parse, verify_burst, request_logging.
+С --with-db (нужен DATABASE_URL с применёнными миграциями): sync_db, logs_page.
+Каждый сценарий по умолчанию идёт в отдельном процессе, чтобы peak_rss_mb относился только к нему.
+
+    cd src && python -m benchmarks.suite --licenses 100000 --output results.json
+    cd src && python -m benchmarks.suite --scenarios list_paging,search --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.fake_upstream import FakeLicenseApi
+from benchmarks.harness import summarize, timed_calls, timed_concurrent
+from benchmarks.synthetic import generate_licenses, snapshot_rows
+
+SEARCH_TERMS = ["ресторан", "kitchen", "№12", "lic-0000", "coffee", "бистро", "00000000-0000", "zzz-no-match"]
+SAMPLE_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0"
+
+
+def _build_snapshot(args):
+    from app.iiko.controllers.license_snapshot import LicenseSnapshot
+
+    rows = snapshot_rows(generate_licenses(args.licenses, args.seed))
+    start = time.perf_counter()
+    snapshot = LicenseSnapshot(1, (len(rows), None), rows)
+    return snapshot, time.perf_counter() - start
+
+
+def list_paging(args, upstream):
+    from app.iiko.controllers.license_snapshot import SORT_FIELDS
+
+    snapshot, build = _build_snapshot(args)
+    rng = random.Random(args.seed)
+    last_page = max(min(args.licenses // args.page_size, 200), 1)
+    calls = [
+        (rng.randint(1, last_page), args.page_size, None, "all", None, None,
+         rng.choice(list(SORT_FIELDS)), rng.choice(["asc", "desc"]))
+        for _ in range(args.requests)
+    ]
+    latencies, elapsed = timed_calls(snapshot.query, calls)
+    results = [summarize("list_paging", latencies, elapsed, unit="pages",
+                         licenses=args.licenses, snapshot_build_s=round(build, 3))]
+
+    # Проход курсором по первым 100 страницам
+    cursor, latencies = None, []
+    start = time.perf_counter()
+    for _ in range(100):
+        call_start = time.perf_counter()
+        page = snapshot.query(limit=args.page_size, after=cursor)
+        latencies.append(time.perf_counter() - call_start)
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    results.append(summarize("list_cursor_walk", latencies, time.perf_counter() - start, unit="pages"))
+    return results
+
+
+def search(args, upstream):
+    snapshot, _ = _build_snapshot(args)
+    rng = random.Random(args.seed)
+    calls = [
+        (1, args.page_size, rng.choice(SEARCH_TERMS), rng.choice(["all", "active", "expired"]),
+         None, rng.choice([None, True, False]))
+        for _ in range(args.requests)
+    ]
+    latencies, elapsed = timed_calls(snapshot.query, calls)
+    return [summarize("search", latencies, elapsed, unit="queries", licenses=args.licenses)]
+
+
+def export(args, upstream):
+    from app.iiko.controllers.iiko_controller import IikoController
+
+    items = list(generate_licenses(args.licenses, args.seed))
+    results = []
+    for fmt in ("csv", "ndjson", "xlsx"):
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in IikoController.export_writer(fmt)(iter(items)))
+        elapsed = time.perf_counter() - start
+        results.append(summarize(f"export_{fmt}", [elapsed], elapsed, units=len(items), unit="rows",
+                                 size_mb=round(size / 1024 / 1024, 2)))
+    return results
+
+
+def sync_parse(args, upstream):
+    """Разбор потока выгрузки, хеши и типизированные поля — всё, что делает синхронизация, кроме записи в БД"""
+    from app.core.http_client import license_api
+    from app.iiko.controllers.iiko_scheduler import IikoScheduler
+
+    latencies, received = [], 0
+    start = batch_start = time.perf_counter()
+    with license_api.stream("GET", name="license.list") as response:
+        for item in IikoScheduler.iter_licenses(response.iter_bytes()):
+            IikoScheduler.record_hash(item)
+            IikoScheduler.license_columns(item)
+            received += 1
+            if received % IikoScheduler.BATCH_SIZE == 0:
+                now = time.perf_counter()
+                latencies.append(now - batch_start)
+                batch_start = now
+    elapsed = time.perf_counter() - start
+    return [summarize("sync_parse", latencies, elapsed, units=received, unit="records",
+                      batch_size=IikoScheduler.BATCH_SIZE, upstream_latency_ms=args.latency)]
+
+
+def sync_db(args, upstream):
+    from app.iiko.controllers.iiko_scheduler import IikoScheduler
+
+    results = []
+    # Первый прогон пишет всё, второй — только сравнивает хеши
+    for name in ("sync_db_initial", "sync_db_unchanged"):
+        start = time.perf_counter()
+        stats = IikoScheduler.update_licenses()
+        elapsed = time.perf_counter() - start
+        results.append(summarize(name, [elapsed], elapsed, units=stats["received"], unit="records", stats=stats))
+    return results
+
+
+def logs_page(args, upstream):
+    from app.logs.controllers.logs_controller import LogsController
+
+    rng = random.Random(args.seed)
+    calls = [(rng.randint(1, 50), args.page_size, None, None, None, "estimate") for _ in range(args.requests)]
+
+    async def run():
+        from app.database.database import async_engine
+        try:
+            return await timed_concurrent(LogsController.get_logs, calls, args.concurrency)
+        finally:
+            await async_engine.dispose()
+
+    latencies, elapsed = asyncio.run(run())
+    return [summarize("logs_page", latencies, elapsed, unit="pages")]
+
+
+def verify_burst(args, upstream):
+    from fastapi import HTTPException
+    from app.core.http_client import license_api
+    from app.iiko.controllers.iiko_controller import IikoController
+
+    rng = random.Random(args.seed)
+    # Четверть уникальных кодов -> остальные запросы попадают в кэш или single-flight, 5% отклоняются
+    pool = [f"LIC-{i:08d}" for i in range(max(args.requests // 4, 1))]
+    codes = [("BAD-" if rng.random() < 0.05 else "") + rng.choice(pool) for _ in range(args.requests)]
+
+    async def verify(code):
+        try:
+            await IikoController.verify_license(code, audit=False)
+        except HTTPException:
+            pass
+
+    async def run():
+        try:
+            return await timed_concurrent(verify, [(code,) for code in codes], args.concurrency)
+        finally:
+            await license_api.aclose()
+
+    IikoController.verify_cache.clear()
+    requests_before = upstream.requests
+    latencies, elapsed = asyncio.run(run())
+    return [summarize("verify_burst", latencies, elapsed, unit="verifications",
+                      upstream_requests=upstream.requests - requests_before, upstream_latency_ms=args.latency,
+                      cache=IikoController.verify_cache_stats())]
+
+
+def request_logging(args, upstream):
+    """Стоимость LoggedFastAPI на запрос относительно голого FastAPI (запись в БД — в фоне log_sink)"""
+    from fastapi import FastAPI
+    from app.core.custom_logger import LoggedFastAPI
+
+    def make_app(cls):
+        app = cls()
+
+        @app.get("/api/ping")
+        async def ping():
+            return {"ok": True}
+        return app
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/ping", "raw_path": b"/api/ping", "query_string": b"page=1",
+        "root_path": "", "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"user-agent", SAMPLE_USER_AGENT.encode()), (b"accept", b"application/json")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run(app):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            call_start = time.perf_counter()
+            await app(dict(scope), receive, send)
+            latencies.append(time.perf_counter() - call_start)
+        return latencies, time.perf_counter() - start
+
+    results = []
+    for name, cls in (("request_plain", FastAPI), ("request_logged", LoggedFastAPI)):
+        latencies, elapsed = asyncio.run(run(make_app(cls)))
+        results.append(summarize(name, latencies, elapsed, unit="requests"))
+    results[1]["overhead_us"] = round((results[1]["elapsed_s"] - results[0]["elapsed_s"]) / args.requests * 1e6, 2)
+    return results
+
+
+SCENARIOS = {
+    "list_paging": list_paging,
+    "search": search,
+    "export": export,
+    "sync_parse": sync_parse,
+    "verify_burst": verify_burst,
+    "request_logging": request_logging,
+    "sync_db": sync_db,
+    "logs_page": logs_page,
+}
+DB_SCENARIOS = {"sync_db", "logs_page"}
+
+
+def start_upstream(args) -> FakeLicenseApi:
+    upstream = FakeLicenseApi(licenses=args.licenses, latency=args.latency / 1000, seed=args.seed).start()
+    # Настройки читаются при импорте app.*, поэтому адрес подменяем до первого импорта
+    os.environ["LICENSE_API_URL"] = upstream.url
+    return upstream
+
+
+def run_isolated(name: str, args) -> list:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        command = [
+            sys.executable, "-m", "benchmarks.suite", "--in-process", "--scenarios", name, "--output", output,
+            "--licenses", str(args.licenses), "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency), "--latency", str(args.latency),
+            "--page-size", str(args.page_size), "--seed", str(args.seed),
+        ]
+        subprocess.run(command, check=True)
+        with open(output) as f:
+            return json.load(f)["results"]
+    finally:
+        os.remove(output)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    print(f"\ncompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get(result["scenario"])
+        if not old:
+            continue
+        throughput = (result["throughput"] / old["throughput"] - 1) * 100 if old["throughput"] else 0.0
+        p95 = (result["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+        print(f"  {result['scenario']:20s} throughput {throughput:+7.1f}%   p95 {p95:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(n for n in SCENARIOS if n not in DB_SCENARIOS))
+    parser.add_argument("--licenses", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=20.0, help="задержка API лицензий, мс")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-db", action="store_true", help="добавить сценарии, которым нужна БД")
+    parser.add_argument("--in-process", action="store_true", help="не запускать сценарии в отдельных процессах")
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    if args.with_db:
+        names += [n for n in DB_SCENARIOS if n not in names]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = []
+    if args.in_process:
+        upstream = start_upstream(args)
+        try:
+            for name in names:
+                results += SCENARIOS[name](args, upstream)
+        finally:
+            upstream.stop()
+    else:
+        for name in names:
+            results += run_isolated(name, args)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "in_process")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+    if not args.in_process:
+        for r in results:
+            print(
+                f"{r['scenario']:20s} {r['throughput']:12.1f} {r['throughput_unit']:16s} "
+                f"p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  p99 {r['p99_ms']:9.3f} ms  "
+                f"rss {r['peak_rss_mb']:8.1f} MB"
+            )
+        if args.compare:
+            compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Синтетические лицензии в формате ответа API лицензий (data['license'], как читают контроллеры)."""
+import random
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ORG_PREFIXES = ["ТОО", "ИП", "АО", "LLP", "Coffee", "Burger", "Sushi"]
+ORG_WORDS = ["Ресторан", "Кафе", "Бар", "Kitchen", "Food", "Pizza", "Lounge", "Grill", "Бистро"]
+CITIES = ["Алматы", "Астана", "Шымкент", "Караганда", "Актобе"]
+SUB_NAMES = ["GosuCashRegisterPlugin", "iikoFront subscription", "iikoDelivery", "iikoChain"]
+BASE_DATE = datetime(2025, 1, 1)
+
+
+def sample_license(i: int, rng: random.Random = None) -> dict:
+    """Одна лицензия; ~3 лицензии на организацию, часть полей бывает пустой, как в реальной выгрузке"""
+    rng = rng or random.Random(i)
+    org_index = i // 3
+    org_id = str(uuid.UUID(int=org_index + 1))
+    generated = BASE_DATE + timedelta(hours=i % 8760)
+    last_request = generated + timedelta(days=rng.randint(0, 400)) if rng.random() > 0.1 else None
+    expiration = generated + timedelta(days=rng.choice([30, 90, 365, 730]))
+    is_online = rng.random() > 0.4 if rng.random() > 0.05 else None
+
+    def iso(value):
+        return value.isoformat() + "Z" if value else None
+
+    return {
+        "license": {
+            "id": str(uuid.UUID(int=10**9 + i)),
+            "organizationId": org_id,
+            "organization": {
+                "id": org_id,
+                "name": f"{rng.choice(ORG_PREFIXES)} {rng.choice(ORG_WORDS)} №{org_index}",
+                "bin": f"{100000000000 + org_index}",
+                "address": f"г. {rng.choice(CITIES)}, ул. Абая, {org_index % 300}",
+                "contacts": [{"type": "phone", "value": f"+7 700 {org_index % 1000:03d} {i % 10000:04d}"}],
+            },
+            "licenseCode": f"LIC-{i:08d}-{rng.getrandbits(32):08x}",
+            "productName": "iiko",
+            "productSubName": rng.choice(SUB_NAMES),
+            "apUId": str(uuid.UUID(int=2 * 10**9 + i)),
+            "isActive": expiration > BASE_DATE + timedelta(days=180),
+            "isOnline": is_online,
+            "isEnabled": rng.random() > 0.02,
+            "generateDate": iso(generated),
+            "lastRequestDate": iso(last_request),
+            "licenseExpirationDate": iso(expiration),
+        },
+        "stats": {"requests": rng.randint(0, 100000), "errors": rng.randint(0, 50)},
+    }
+
+
+def generate_licenses(count: int, seed: int = 42):
+    """Детерминированный поток лицензий: одинаковый seed -> одинаковые данные между прогонами"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield sample_license(i, rng)
+
+
+def snapshot_rows(items):
+    """Строки для LicenseSnapshot без БД — те же поля, что выбирает LicenseSnapshotStore.refresh"""
+    from app.iiko.controllers.iiko_scheduler import IikoScheduler
+
+    rows = []
+    for row_id, item in enumerate(items, start=1):
+        rows.append(SimpleNamespace(
+            id=row_id,
+            data=item,
+            updated_at=BASE_DATE + timedelta(seconds=row_id * 7 % 86400, days=row_id % 30),
+            **IikoScheduler.license_columns(item),
+        ))
+    return rows
@@ -1,28 +1,76 @@
 import os
+import time
 import uvicorn
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.custom_logger import LoggedFastAPI
+from app.core.log_sink import log_sink
+from app.core.logger import logger
+from app.core.http_client import license_api
+from app.core.metrics import request_metrics
+from app.core.scheduler import scheduler
+from app.core.compression import CompressionMiddleware
+from app.core.frontend import FrontendAssets
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse
 from app.auth.routes.auth_routes import router as auth_router
 from app.iiko.routes.iiko_routes import router as iiko_router
 from app.logs.routes.logs_routes import router as logs_router
-from app.database.database import Base, engine
+from app.database.database import async_engine
+from app.database.migrate import ensure_schema
+from app.iiko.controllers.license_snapshot import license_snapshots
+from app.iiko.controllers.export_jobs import ExportJobs
 from app.seeders.seed_admin import run_seed
+from app.auth.auth import shutdown_hash_pool
 
-app = LoggedFastAPI(title="Integration & License Manager API")
+app = LoggedFastAPI(title="Integration & License Manager API", default_response_class=FastJSONResponse)
+frontend = FrontendAssets(os.path.join(os.path.dirname(__file__), "client_dist"))
 
 @app.on_event("startup")
 def startup_event():
-    Base.metadata.create_all(bind=engine)
-    run_seed()
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        func()
+        timings[name] = time.perf_counter() - start
+
+    # Вместо create_all и миграций — проверка, что схема уже подготовлена migrate-командой
+    step("schema", ensure_schema)
+    if settings.SEED_ON_STARTUP:
+        step("seed", run_seed)
+    step("log_sink", log_sink.start)
+    step("metrics", request_metrics.start)
+    step("frontend", frontend.load)
+    # Снимок лицензий собирается и обновляется в фоне, чтобы не задерживать старт и запросы
+    if settings.LICENSE_SNAPSHOT_ENABLED:
+        step("license_snapshot", license_snapshots.start)
+    if settings.SCHEDULER_ENABLED:
+        step("scheduler", scheduler.start)
+    logger.info("Startup: " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    await license_api.aclose()
+    await async_engine.dispose()
+    request_metrics.stop()
+    license_snapshots.stop()
+    shutdown_hash_pool()
+    ExportJobs.shutdown()
+    log_sink.stop()
 
 app.include_router(auth_router, prefix="/api")
 app.include_router(iiko_router, prefix="/api")
 app.include_router(logs_router, prefix="/api")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -31,20 +79,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-frontend_dir = os.path.join(os.path.dirname(__file__), "client_dist")
-if os.path.exists(frontend_dir):
-    app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="frontend")
+# Сжимает JSON API. Статику client_dist FrontendAssets отдаёт уже сжатой,
+# а ответы с Content-Encoding middleware пропускает
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
 
-@app.get("/{full_path:path}")
-async def serve_react(full_path: str):
-    index_path = os.path.join(frontend_dir, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    return {"detail": "Frontend not built"}
+@app.get("/", include_in_schema=False)
+def root(request: Request):
+    response = frontend.response("", request.headers)
+    if response is None:
+        return {"status": "ok", "message": "API is running"}
+    return response
 
-@app.get("/")
-def root():
-    return {"status": "ok", "message": "API is running"}
+@app.get("/{full_path:path}", include_in_schema=False)
+def serve_react(full_path: str, request: Request):
+    # Неизвестные пути API — 404, а не index.html
+    if full_path.startswith("api/"):
+        return FastJSONResponse({"detail": "Not Found"}, status_code=404)
+    response = frontend.response(full_path, request.headers)
+    if response is None:
+        return {"detail": "Frontend not built"}
+    return response
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)